@@ -0,0 +1,177 @@
+# admission.py
+"""
+Contrôle d'admission des routes dépendant de CoinMarketCap.
+
+Chaque classe de routes a une limite de requêtes simultanées et une file
+d'attente bornée avec délai maximal. Quand le backend est saturé (file
+pleine ou attente expirée), la requête est rejetée immédiatement en 503
+avec Retry-After, ou servie depuis la dernière réponse GET réussie si
+elle existe encore, au lieu de laisser la latence croître sans limite
+dans le pool de threads de FastAPI.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Nombre de réponses GET conservées pour le mode dégradé
+STALE_CACHE_SIZE = 256
+
+
+class Limiter:
+    """Limite de concurrence avec file d'attente bornée pour une classe de routes"""
+
+    def __init__(self, concurrency: int, max_queue: int, queue_timeout: float):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> bool:
+        """Attendre une place (False si la file est pleine ou l'attente expirée)"""
+        # Places occupées = en cours + en attente (comptées avant tout await)
+        if self.in_flight + self.queued >= self.concurrency + self.max_queue:
+            self.shed += 1
+            return False
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def status(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionControl:
+    """Classes de routes, limiteurs associés et dernières réponses GET réussies"""
+
+    def __init__(self, limiters: Dict[str, Limiter], routes: Dict[str, str], stale_max_age: float):
+        self.limiters = limiters
+        self.routes = routes
+        self.stale_max_age = stale_max_age
+        self.stale_served = 0
+        self._responses: "OrderedDict[Tuple[str, bytes], tuple]" = OrderedDict()
+
+    def classify(self, path: str) -> Optional[str]:
+        return self.routes.get(path.rstrip("/") or "/")
+
+    def remember(self, key: Tuple[str, bytes], status: int, headers: List[tuple], body: bytes):
+        self._responses[key] = (status, headers, body, time.time())
+        self._responses.move_to_end(key)
+        while len(self._responses) > STALE_CACHE_SIZE:
+            self._responses.popitem(last=False)
+
+    def cached(self, key: Tuple[str, bytes]) -> Optional[tuple]:
+        entry = self._responses.get(key)
+        if entry is None or time.time() - entry[3] > self.stale_max_age:
+            return None
+        return entry
+
+    def status(self) -> dict:
+        return {
+            "classes": {name: limiter.status() for name, limiter in self.limiters.items()},
+            "routes": self.routes,
+            "stale_served": self.stale_served,
+            "stale_cached": len(self._responses),
+        }
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI appliquant AdmissionControl aux routes classées"""
+
+    def __init__(self, app, control: AdmissionControl):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route_class = self.control.classify(scope["path"])
+        if route_class is None:
+            return await self.app(scope, receive, send)
+
+        limiter = self.control.limiters[route_class]
+        is_get = scope["method"] == "GET"
+        key = (scope["path"], scope.get("query_string", b""))
+
+        if not await limiter.acquire():
+            entry = self.control.cached(key) if is_get else None
+            if entry is not None:
+                return await self._send_stale(send, entry)
+            return await self._send_overloaded(send, limiter)
+
+        try:
+            if not is_get:
+                return await self.app(scope, receive, send)
+
+            # Capturer la réponse pour pouvoir la resservir en mode dégradé
+            start, chunks = {}, []
+
+            async def capture(message):
+                if message["type"] == "http.response.start":
+                    start.update(message)
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+                    if not message.get("more_body", False) and start.get("status") == 200:
+                        self.control.remember(key, 200, list(start.get("headers", [])), b"".join(chunks))
+                await send(message)
+
+            await self.app(scope, receive, capture)
+        finally:
+            limiter.release()
+
+    async def _send_stale(self, send, entry: tuple):
+        status, headers, body, stored_at = entry
+        self.control.stale_served += 1
+        age = int(time.time() - stored_at)
+        headers = [(k, v) for k, v in headers if k.lower() not in (b"age", b"warning")]
+        headers += [
+            (b"age", str(age).encode()),
+            (b"warning", b'110 - "Response is Stale"'),
+            (b"x-cache", b"stale"),
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_overloaded(self, send, limiter: Limiter):
+        body = json.dumps({"detail": "Service saturé, réessayez plus tard"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(limiter.queue_timeout))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,347 @@
+# alert_engine.py
+"""
+Index en mémoire des alertes actives, stocké en colonnes NumPy.
+
+Chaque tick est évalué par opérations vectorielles sur toutes les alertes
+(tous types confondus) au lieu d'une boucle Python objet par objet.
+L'état nécessaire aux alertes avancées (dernier prix et historique récent
+par symbole, plus haut/bas suivi des stops suiveurs) est conservé ici.
+
+Une évaluation se fait en deux temps: prepare() calcule les déclenchements
+et le nouvel état sans modifier l'index, commit() applique cet état une
+fois les déclenchements enregistrés en base. Si l'enregistrement échoue,
+l'index reste tel qu'avant le tick et le tick suivant est évalué à
+l'identique (franchissements compris).
+"""
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+# Codes des conditions (colonne `kind`)
+ABOVE, BELOW, CROSS_UP, CROSS_DOWN, PCT_CHANGE, TRAILING = range(6)
+
+CONDITION_CODES = {
+    "above": ABOVE,
+    "below": BELOW,
+    "cross_up": CROSS_UP,
+    "cross_down": CROSS_DOWN,
+    "pct_change": PCT_CHANGE,
+    "trailing": TRAILING,
+}
+CONDITION_NAMES = {code: name for name, code in CONDITION_CODES.items()}
+
+# Historique des prix par symbole pour les alertes pct_change: au plus un
+# point par intervalle de HISTORY_RESOLUTION secondes (le dernier prix reçu
+# dans l'intervalle), quelle que soit la fréquence des cotations
+HISTORY_RESOLUTION = 60
+
+# Fenêtre maximale des alertes pct_change (24h): l'historique par défaut
+# la couvre entièrement, plus une marge d'un intervalle
+MAX_WINDOW_SECONDS = 24 * 3600
+DEFAULT_HISTORY_SIZE = MAX_WINDOW_SECONDS // HISTORY_RESOLUTION + 2
+
+
+class Tick(NamedTuple):
+    """Résultat d'une évaluation, pas encore appliqué à l'index"""
+    now: float
+    px: np.ndarray  # Prix reçus par symbole (nan si absent)
+    triggered: List[dict]
+    references: List[Tuple[int, float]]  # Plus hauts/bas des stops suiveurs modifiés
+
+
+class AlertEngine:
+    """Alertes actives en colonnes NumPy, évaluées en un seul passage vectoriel"""
+
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE):
+        self._lock = threading.RLock()
+        self.history_size = history_size
+
+        # Symboles: index dense + historique circulaire des prix par symbole
+        self._symbol_index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._hist_ts = np.full((0, history_size), np.nan)
+        self._hist_px = np.full((0, history_size), np.nan)
+        self._hist_head = np.zeros(0, dtype=np.int64)
+        self._last_px = np.zeros(0)
+
+        self._set_columns(*self._empty_columns())
+
+    # ---------- Colonnes ----------
+
+    @staticmethod
+    def _empty_columns() -> tuple:
+        return (
+            np.zeros(0, dtype=np.int64),    # ids
+            np.zeros(0, dtype=np.int64),    # sym
+            np.zeros(0, dtype=np.int8),     # kind
+            np.zeros(0),                    # target
+            np.zeros(0),                    # percent
+            np.zeros(0),                    # window
+            np.zeros(0),                    # ref (plus haut/bas suivi)
+        )
+
+    def _set_columns(self, ids, sym, kind, target, percent, window, ref):
+        self._ids, self._sym, self._kind = ids, sym, kind
+        self._target, self._percent, self._window = target, percent, window
+        self._ref = ref
+        self._pos = {int(alert_id): row for row, alert_id in enumerate(ids)}
+
+    def _columns(self) -> tuple:
+        return (
+            self._ids, self._sym, self._kind, self._target,
+            self._percent, self._window, self._ref
+        )
+
+    def _symbol_row(self, symbol: str) -> int:
+        """Index du symbole, en agrandissant l'historique si nécessaire"""
+        row = self._symbol_index.get(symbol)
+        if row is not None:
+            return row
+
+        row = len(self._symbols)
+        capacity = self._hist_ts.shape[0]
+        if row >= capacity:
+            grow = max(16, capacity)
+            self._hist_ts = np.vstack([self._hist_ts, np.full((grow, self.history_size), np.nan)])
+            self._hist_px = np.vstack([self._hist_px, np.full((grow, self.history_size), np.nan)])
+            self._hist_head = np.concatenate([self._hist_head, np.zeros(grow, dtype=np.int64)])
+            self._last_px = np.concatenate([self._last_px, np.full(grow, np.nan)])
+
+        self._symbol_index[symbol] = row
+        self._symbols.append(symbol)
+        return row
+
+    def _build(self, alerts: Iterable) -> tuple:
+        """Convertir des alertes (ORM ou objets équivalents) en colonnes"""
+        rows = [
+            (
+                alert.id,
+                self._symbol_row(alert.symbol),
+                CONDITION_CODES[alert.condition],
+                np.nan if alert.target_price is None else alert.target_price,
+                np.nan if getattr(alert, "percent", None) is None else alert.percent,
+                np.nan if getattr(alert, "window_seconds", None) is None else alert.window_seconds,
+                np.nan if getattr(alert, "reference_price", None) is None else alert.reference_price,
+            )
+            for alert in alerts
+            if alert.condition in CONDITION_CODES
+        ]
+        if not rows:
+            return self._empty_columns()
+
+        ids, sym, kind, target, percent, window, ref = zip(*rows)
+        return (
+            np.array(ids, dtype=np.int64),
+            np.array(sym, dtype=np.int64),
+            np.array(kind, dtype=np.int8),
+            np.array(target, dtype=float),
+            np.array(percent, dtype=float),
+            np.array(window, dtype=float),
+            np.array(ref, dtype=float),
+        )
+
+    # ---------- Maintenance de l'index ----------
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self, alerts: Iterable):
+        """
+        Remplacer l'index par les alertes actives fournies.
+        L'état (plus haut/bas suivi) des alertes déjà connues est conservé.
+        """
+        with self._lock:
+            columns = self._build(alerts)
+            ids, ref = columns[0], columns[6]
+            for row, alert_id in enumerate(ids):
+                old = self._pos.get(int(alert_id))
+                if old is not None and not np.isnan(self._ref[old]):
+                    ref[row] = self._ref[old]
+            self._set_columns(*columns)
+
+    def add(self, alerts: Iterable):
+        """Ajouter de nouvelles alertes actives"""
+        with self._lock:
+            new = self._build(alerts)
+            if len(new[0]):
+                self._set_columns(*[np.concatenate([old, add]) for old, add in zip(self._columns(), new)])
+
+    def remove(self, alert_ids: Iterable[int]):
+        """Retirer des alertes (supprimées, annulées ou déclenchées)"""
+        with self._lock:
+            keep = ~np.isin(self._ids, np.fromiter(alert_ids, dtype=np.int64))
+            if not keep.all():
+                self._set_columns(*[column[keep] for column in self._columns()])
+
+    def symbols(self) -> List[str]:
+        """Symboles ayant au moins une alerte active"""
+        with self._lock:
+            return [self._symbols[row] for row in np.unique(self._sym)]
+
+    def counts_by_symbol(self) -> Dict[str, int]:
+        """Nombre d'alertes actives par symbole"""
+        with self._lock:
+            rows, counts = np.unique(self._sym, return_counts=True)
+            return {self._symbols[row]: int(count) for row, count in zip(rows, counts)}
+
+    # ---------- Évaluation ----------
+
+    def _window_reference(self, rows: np.ndarray, now: float) -> np.ndarray:
+        """
+        Prix de référence des alertes pct_change: le prix en vigueur au début
+        de la fenêtre, c'est-à-dire le dernier prix reçu à cet instant ou avant
+        (à HISTORY_RESOLUTION près). Inconnu (nan) si l'historique ne remonte
+        pas jusque-là. Calculé une fois par couple symbole/fenêtre.
+        """
+        pairs, inverse = np.unique(
+            np.column_stack([self._sym[rows], self._window[rows]]), axis=0, return_inverse=True
+        )
+        pair_sym = pairs[:, 0].astype(np.int64)
+        pair_window = pairs[:, 1]
+
+        ts = self._hist_ts[pair_sym]
+        masked = np.where(ts <= (now - pair_window)[:, None], ts, -np.inf)
+        latest = masked.argmax(axis=1)
+        found = np.isfinite(masked[np.arange(len(pairs)), latest])
+        reference = np.where(found, self._hist_px[pair_sym, latest], np.nan)
+        return reference[inverse.reshape(-1)]
+
+    def proximity(self, now: float) -> Dict[str, float]:
+        """
+        Distance relative minimale au déclenchement (|prix - seuil| / prix) par
+        symbole, d'après le dernier prix connu. 0 si le prix est encore inconnu,
+        infinie pour une alerte dont le seuil est encore inconnu (pct_change
+        sans prix au début de sa fenêtre).
+        """
+        with self._lock:
+            if not len(self._ids):
+                return {}
+
+            last = self._last_px[:len(self._symbols)][self._sym]
+            level = self._target.copy()
+
+            rows = np.flatnonzero(self._kind == TRAILING)
+            level[rows] = self._ref[rows] * (1 - self._percent[rows] / 100)
+            rows = np.flatnonzero(self._kind == PCT_CHANGE)
+            if len(rows):
+                level[rows] = self._window_reference(rows, now) * (1 + self._percent[rows] / 100)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                distance = np.abs(last - level) / last
+            distance = np.where(np.isnan(last), 0.0, np.where(np.isnan(level), np.inf, distance))
+
+            closest = np.full(len(self._symbols), np.inf)
+            np.minimum.at(closest, self._sym, distance)
+            return {self._symbols[row]: float(closest[row]) for row in np.unique(self._sym)}
+
+    def _record(self, px: np.ndarray, now: float):
+        """
+        Ajouter les prix reçus à l'historique circulaire des symboles. Un prix
+        reçu dans le même intervalle de HISTORY_RESOLUTION que le point
+        précédent le remplace: l'historique couvre une durée fixe.
+        """
+        rows = np.flatnonzero(~np.isnan(px))
+        head = self._hist_head[rows]
+        previous = (head - 1) % self.history_size
+        same = (head > 0) & (
+            self._hist_ts[rows, previous] // HISTORY_RESOLUTION == now // HISTORY_RESOLUTION
+        )
+        cols = np.where(same, previous, head % self.history_size)
+        self._hist_ts[rows, cols] = now
+        self._hist_px[rows, cols] = px[rows]
+        self._hist_head[rows] += ~same
+        self._last_px[rows] = px[rows]
+
+    def evaluate(self, prices: Dict[str, float], now: float) -> List[dict]:
+        """
+        Évaluer et appliquer immédiatement un tick (sans enregistrement à
+        attendre). Les alertes déclenchées sont retirées de l'index et retournées.
+        """
+        with self._lock:
+            tick = self.prepare(prices, now)
+            self.commit(tick)
+            return tick.triggered
+
+    def prepare(self, prices: Dict[str, float], now: float) -> Tick:
+        """
+        Évaluer toutes les alertes actives pour les prix fournis ({symbole: prix})
+        sans modifier l'index (voir commit).
+        """
+        with self._lock:
+            px = np.full(len(self._symbols), np.nan)
+            for symbol, price in prices.items():
+                row = self._symbol_index.get(symbol)
+                if row is not None:
+                    px[row] = price
+
+            n = len(self._ids)
+            kind, target, percent = self._kind, self._target, self._percent
+            price = px[self._sym]
+            previous = self._last_px[:len(self._symbols)][self._sym]
+            has_price = ~np.isnan(price)
+            level = target.copy()
+            references = []
+
+            # Seuils statiques et franchissements (nan => jamais vrai)
+            trig = (
+                ((kind == ABOVE) & (price >= target))
+                | ((kind == BELOW) & (price <= target))
+                | ((kind == CROSS_UP) & (previous < target) & (price >= target))
+                | ((kind == CROSS_DOWN) & (previous > target) & (price <= target))
+            )
+
+            # Stop suiveur: plus haut (percent > 0) ou plus bas (percent < 0) suivi
+            rows = np.flatnonzero((kind == TRAILING) & has_price)
+            if len(rows):
+                pct, ref, current = percent[rows], self._ref[rows], price[rows]
+                new_ref = np.where(pct > 0, np.fmax(ref, current), np.fmin(ref, current))
+                moved = new_ref != ref
+                references = [
+                    (int(alert_id), float(value))
+                    for alert_id, value in zip(self._ids[rows][moved], new_ref[moved])
+                ]
+                stop = new_ref * (1 - pct / 100)
+                trig[rows] = np.where(pct > 0, current <= stop, current >= stop)
+                level[rows] = stop
+
+            # Variation en % sur une fenêtre glissante
+            rows = np.flatnonzero((kind == PCT_CHANGE) & has_price)
+            if len(rows):
+                pct, current = percent[rows], price[rows]
+                reference = self._window_reference(rows, now)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    change = (current / reference - 1) * 100
+                trig[rows] = np.where(pct > 0, change >= pct, change <= pct)
+                level[rows] = reference * (1 + pct / 100)
+
+            fired = np.flatnonzero(trig & has_price) if n else np.zeros(0, dtype=np.int64)
+            triggered = [
+                {
+                    "alert_id": int(self._ids[row]),
+                    "symbol": self._symbols[self._sym[row]],
+                    "condition": CONDITION_NAMES[int(kind[row])],
+                    "target_price": None if np.isnan(target[row]) else float(target[row]),
+                    "threshold": float(level[row]),
+                    "current_price": float(price[row]),
+                }
+                for row in fired
+            ]
+            return Tick(now, px, triggered, references)
+
+    def commit(self, tick: Tick):
+        """
+        Appliquer un tick enregistré: historique et derniers prix, plus hauts/bas
+        suivis, retrait des alertes déclenchées. Les alertes sont retrouvées par
+        id: l'index peut avoir changé depuis prepare().
+        """
+        with self._lock:
+            px = np.full(len(self._symbols), np.nan)
+            px[:len(tick.px)] = tick.px
+            self._record(px, tick.now)
+            for alert_id, value in tick.references:
+                row = self._pos.get(alert_id)
+                if row is not None:
+                    self._ref[row] = value
+            if tick.triggered:
+                self.remove([t["alert_id"] for t in tick.triggered])
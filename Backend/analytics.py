@@ -0,0 +1,168 @@
+# analytics.py
+"""
+Indicateurs de performance du portefeuille calculés avec NumPy
+(volatilité glissante, drawdown maximal, ratio de Sharpe, contributions
+et corrélations par actif). Les résultats sont mémorisés par clé
+(paramètres, dernier snapshot) pour ne jamais être recalculés tant
+qu'aucun nouveau snapshot n'est enregistré.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# Nombre de résultats conservés en mémoire
+CACHE_SIZE = 64
+
+_cache: "OrderedDict[Hashable, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def memoized(key: Hashable, compute: Callable[[], dict]) -> dict:
+    """Retourner le résultat mémorisé pour key, ou le calculer (cache LRU borné)"""
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = compute()
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def _finite(value) -> Optional[float]:
+    """Convertir en float JSON (None pour nan / inf)"""
+    value = float(value)
+    return round(value, 6) if np.isfinite(value) else None
+
+
+def _iso(timestamp: float) -> str:
+    """Timestamp epoch (UTC) vers ISO 8601, comme /portfolio/history"""
+    return datetime.utcfromtimestamp(float(timestamp)).isoformat()
+
+
+def to_epoch(datetimes: List[datetime]) -> np.ndarray:
+    """Dates naïves UTC (colonnes DateTime) vers secondes epoch"""
+    return np.array(datetimes, dtype="datetime64[us]").astype(np.int64) / 1e6
+
+
+def periods_per_year(timestamps: np.ndarray) -> float:
+    """Nombre de périodes par an, d'après l'intervalle médian entre snapshots"""
+    if len(timestamps) < 2:
+        return np.nan
+    step = np.median(np.diff(timestamps))
+    return SECONDS_PER_YEAR / step if step > 0 else np.nan
+
+
+def simple_returns(values: np.ndarray) -> np.ndarray:
+    """Rendements simples entre points consécutifs (axe 0)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.diff(values, axis=0) / values[:-1]
+    return np.where(np.isfinite(returns), returns, np.nan)
+
+
+def rolling_volatility(returns: np.ndarray, window: int) -> np.ndarray:
+    """Écart-type glissant des rendements sur `window` périodes"""
+    if len(returns) < window:
+        return np.zeros(0)
+    return np.nanstd(sliding_window_view(returns, window), axis=-1, ddof=1)
+
+
+def max_drawdown(values: np.ndarray) -> tuple:
+    """Drawdown maximal (fraction négative) et indices du pic et du creux"""
+    peaks = np.maximum.accumulate(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdowns = np.where(peaks > 0, values / peaks - 1, 0.0)
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(values[:trough + 1]))
+    return float(drawdowns[trough]), peak, trough
+
+
+def sharpe_ratio(returns: np.ndarray, ppy: float, risk_free_rate: float = 0.0) -> float:
+    """Ratio de Sharpe annualisé"""
+    returns = returns[np.isfinite(returns)]
+    if len(returns) < 2 or not np.isfinite(ppy):
+        return np.nan
+    excess = returns - risk_free_rate / ppy
+    std = excess.std(ddof=1)
+    return excess.mean() / std * np.sqrt(ppy) if std > 0 else np.nan
+
+
+def asset_breakdown(symbols: List[str], weights: np.ndarray, prices: np.ndarray) -> dict:
+    """
+    Contribution de chaque actif au rendement et matrice de corrélation.
+    prices: matrice (points, actifs) des prix alignés dans le temps.
+    """
+    returns = simple_returns(prices)
+    asset_returns = prices[-1] / prices[0] - 1
+    contribution = weights * asset_returns
+    valid = ~np.isnan(returns).any(axis=1)
+    if valid.sum() >= 2:
+        correlation = np.corrcoef(returns[valid], rowvar=False)
+    else:
+        correlation = np.full((len(symbols), len(symbols)), np.nan)
+    correlation = np.atleast_2d(correlation)
+
+    return {
+        "contribution": [
+            {
+                "symbol": symbol,
+                "weight": _finite(weight),
+                "return_pct": _finite(ret * 100),
+                "contribution_pct": _finite(contrib * 100),
+            }
+            for symbol, weight, ret, contrib in zip(symbols, weights, asset_returns, contribution)
+        ],
+        "correlation": {
+            "symbols": symbols,
+            "matrix": [[_finite(x) for x in row] for row in correlation],
+        },
+    }
+
+
+def portfolio_analytics(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    window: int,
+    risk_free_rate: float = 0.0,
+    assets: Optional[Dict] = None
+) -> dict:
+    """
+    Calculer tous les indicateurs sur la série de valeurs du portefeuille.
+    assets (optionnel): {"symbols", "weights", "prices"} pour le détail par actif.
+    """
+    returns = simple_returns(values)
+    ppy = periods_per_year(timestamps)
+    volatility = rolling_volatility(returns, window)
+    drawdown, peak, trough = max_drawdown(values)
+    # Chaque point de volatilité correspond à la fin de sa fenêtre
+    vol_timestamps = timestamps[window:]
+
+    return {
+        "data_points": len(values),
+        "total_return_pct": _finite((values[-1] / values[0] - 1) * 100) if values[0] > 0 else None,
+        "volatility": {
+            "window": window,
+            "latest": _finite(volatility[-1]) if len(volatility) else None,
+            "annualized_latest": _finite(volatility[-1] * np.sqrt(ppy)) if len(volatility) else None,
+            "series": [
+                {"timestamp": _iso(ts), "value": _finite(vol)}
+                for ts, vol in zip(vol_timestamps, volatility)
+            ],
+        },
+        "max_drawdown": {
+            "value_pct": _finite(drawdown * 100),
+            "peak_timestamp": _iso(timestamps[peak]),
+            "trough_timestamp": _iso(timestamps[trough]),
+        },
+        "sharpe_ratio": _finite(sharpe_ratio(returns, ppy, risk_free_rate)),
+        "assets": asset_breakdown(**assets) if assets else None,
+    }
@@ -0,0 +1,112 @@
+# backtest.py
+"""
+Rejeu vectoriel de définitions d'alertes sur l'historique des cotations.
+
+Les alertes d'un même symbole et d'un même type sont évaluées ensemble
+par diffusion NumPy (matrice alertes x cotations, découpée en blocs),
+sans boucle Python sur les points de l'historique.
+
+Une alerte est considérée comme réarmée dès que sa condition redevient
+fausse: chaque passage de faux à vrai compte comme un déclenchement.
+Pour un stop suiveur, le plus haut (ou plus bas) n'est pas réinitialisé
+après un déclenchement.
+Pour une variation (pct_change), la référence est le dernier prix connu à
+ou avant le début de la fenêtre, comme dans alert_engine: aucune variation
+n'est mesurée tant que l'historique ne remonte pas jusque-là.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+# Taille maximale d'un bloc de la matrice alertes x cotations
+MAX_BLOCK_CELLS = 4_000_000
+
+
+def _conditions(kind: str, ts: np.ndarray, px: np.ndarray, alerts: list) -> np.ndarray:
+    """Matrice booléenne (alertes, cotations): condition vraie à chaque cotation"""
+    target = np.array([a.target_price or np.nan for a in alerts], dtype=float)[:, None]
+    percent = np.array([a.percent or np.nan for a in alerts], dtype=float)[:, None]
+    price = px[None, :]
+
+    if kind == "above":
+        return price >= target
+    if kind == "below":
+        return price <= target
+    if kind in ("cross_up", "cross_down"):
+        previous = np.concatenate([[np.nan], px[:-1]])[None, :]
+        if kind == "cross_up":
+            return (previous < target) & (price >= target)
+        return (previous > target) & (price <= target)
+    if kind == "trailing":
+        high = np.maximum.accumulate(px)[None, :]
+        low = np.minimum.accumulate(px)[None, :]
+        return np.where(
+            percent > 0,
+            price <= high * (1 - percent / 100),
+            price >= low * (1 - percent / 100)
+        )
+    if kind == "pct_change":
+        window_ms = np.array([a.window_seconds for a in alerts], dtype=np.int64)[:, None] * 1000
+        since = ts[None, :] - window_ms
+        # Prix en vigueur au début de chaque fenêtre: dernière cotation à
+        # ou avant now - fenêtre, comme l'index des alertes (aucune: NaN)
+        start = np.searchsorted(ts, since.ravel(), side="right").reshape(since.shape) - 1
+        reference = np.where(start >= 0, px[np.maximum(start, 0)], np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change = (price / reference - 1) * 100
+        return np.where(percent > 0, change >= percent, change <= percent)
+    raise ValueError(f"Condition inconnue: {kind}")
+
+
+def _rising_edges(mask: np.ndarray) -> np.ndarray:
+    """Passages de faux à vrai (vrai dès la première cotation compte)"""
+    previous = np.zeros_like(mask)
+    previous[:, 1:] = mask[:, :-1]
+    return mask & ~previous
+
+
+def _iso(ts_ms: int) -> str:
+    return datetime.utcfromtimestamp(ts_ms / 1000).isoformat()
+
+
+def run_backtest(alerts: list, series: Dict[str, tuple], max_events: int = 100) -> List[dict]:
+    """
+    Rejouer les alertes (objets AlertCreate) sur les séries {symbole: (ts_ms, prix)}.
+    Retourne, dans l'ordre des alertes, le nombre et les dates de déclenchement.
+    """
+    results: List[dict] = [None] * len(alerts)
+
+    # Regrouper par (symbole, condition) pour évaluer chaque groupe en bloc
+    groups: Dict[tuple, List[int]] = {}
+    for position, alert in enumerate(alerts):
+        groups.setdefault((alert.symbol, alert.condition), []).append(position)
+
+    for (symbol, kind), positions in groups.items():
+        ts, px = series.get(symbol, (np.zeros(0, dtype=np.int64), np.zeros(0)))
+        if len(px) == 0:
+            for position in positions:
+                results[position] = {"data_points": 0, "trigger_count": 0, "first_trigger": None, "triggers": []}
+            continue
+
+        block = max(1, MAX_BLOCK_CELLS // len(px))
+        for offset in range(0, len(positions), block):
+            chunk = positions[offset:offset + block]
+            fired = _rising_edges(_conditions(kind, ts, px, [alerts[p] for p in chunk]))
+            counts = fired.sum(axis=1)
+            first = fired.argmax(axis=1)
+            for row, position in enumerate(chunk):
+                events = np.flatnonzero(fired[row])[:max_events]
+                results[position] = {
+                    "data_points": len(px),
+                    "trigger_count": int(counts[row]),
+                    "first_trigger": _iso(int(ts[first[row]])) if counts[row] else None,
+                    "triggers": [
+                        {"timestamp": _iso(int(ts[i])), "price": float(px[i])}
+                        for i in events
+                    ],
+                }
+
+    for position, alert in enumerate(alerts):
+        results[position] = {"alert": alert.model_dump(exclude_none=True), **results[position]}
+    return results
@@ -0,0 +1,74 @@
+# bulk_import.py
+"""
+Lecture en flux des fichiers d'import (CSV / NDJSON) et validation
+ligne par ligne avec les schémas pydantic existants.
+"""
+import codecs
+import csv
+import json
+from typing import BinaryIO, Iterator, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+
+class ImportRowError(ValueError):
+    """Erreur de validation sur une ligne du fichier importé"""
+
+    def __init__(self, line: int, message: str):
+        self.line = line
+        self.message = message
+        super().__init__(f"Ligne {line}: {message}")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str], fmt: Optional[str] = None) -> str:
+    """Déterminer le format du fichier (paramètre explicite, extension puis content-type)"""
+    if fmt:
+        fmt = fmt.lower()
+    elif filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        fmt = "ndjson"
+    elif filename and filename.lower().endswith(".csv"):
+        fmt = "csv"
+    elif content_type and "ndjson" in content_type:
+        fmt = "ndjson"
+    else:
+        fmt = "csv"
+
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Format non supporté: {fmt} (attendu: {', '.join(SUPPORTED_FORMATS)})")
+    return fmt
+
+
+def iter_raw_rows(stream: BinaryIO, fmt: str) -> Iterator[tuple]:
+    """Lire le fichier ligne par ligne sans le charger entièrement en mémoire"""
+    text = codecs.getreader("utf-8-sig")(stream)
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Ignorer les colonnes vides pour laisser pydantic signaler les champs manquants
+            yield reader.line_num, {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+        return
+
+    for line_num, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportRowError(line_num, f"JSON invalide ({e.msg})")
+
+
+def iter_validated(stream: BinaryIO, fmt: str, model: Type[ModelT]) -> Iterator[ModelT]:
+    """Valider chaque ligne avec le schéma pydantic; lève ImportRowError à la première erreur"""
+    for line_num, raw in iter_raw_rows(stream, fmt):
+        try:
+            yield model.model_validate(raw)
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(part) for part in first.get("loc", ()))
+            raise ImportRowError(line_num, f"{field}: {first.get('msg')}")
@@ -1,11 +1,78 @@
 # crud.py
+from sqlalchemy import bindparam, func, insert, literal, select, tuple_, update
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List, Optional
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+import base64
+import json
+import uuid
 import database_models
 import models
 
 
+# Taille des paquets pour les insertions en masse
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    """Découper un flux de lignes en paquets de taille fixe"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bulk_insert(db: Session, table, rows: Iterable[dict], chunk_size: int) -> int:
+    """
+    Insérer des lignes par paquets (executemany) dans une seule transaction.
+    En cas d'erreur (y compris de validation dans le flux), tout est annulé.
+    """
+    count = 0
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            db.execute(insert(table), chunk)
+            count += len(chunk)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return count
+
+
+# ==================== PAGINATION PAR CURSEUR ====================
+
+# Nombre maximum d'éléments par page
+MAX_PAGE_SIZE = 1000
+
+# Colonnes lues par les listes (champs de AssetResponse / AlertResponse)
+ASSET_COLUMNS = ("id", "symbol", "amount", "created_at", "updated_at")
+ALERT_COLUMNS = (
+    "id", "symbol", "target_price", "condition", "percent",
+    "window_seconds", "status", "created_at", "triggered_at"
+)
+
+
+def encode_cursor(*values) -> str:
+    """Encoder la clé de tri du dernier élément d'une page en curseur opaque"""
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Décoder un curseur produit par encode_cursor (ValueError si invalide)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+    if not isinstance(values, list):
+        raise ValueError("Curseur invalide")
+    return values
+
+
 # ==================== ASSET OPERATIONS ====================
 
 def create_asset(db: Session, asset: models.AssetCreate) -> database_models.Asset:
@@ -20,11 +87,63 @@ def create_asset(db: Session, asset: models.AssetCreate) -> database_models.Asse
     return db_asset
 
 
+def bulk_create_assets(
+    db: Session,
+    assets: Iterable[models.AssetCreate],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """Importer des actifs en masse (une transaction, insertions par paquets)"""
+    now = datetime.utcnow()
+    rows = (
+        {"symbol": asset.symbol, "amount": asset.amount, "created_at": now, "updated_at": now}
+        for asset in assets
+    )
+    return _bulk_insert(db, database_models.Asset.__table__, rows, chunk_size)
+
+
 def get_assets(db: Session) -> List[database_models.Asset]:
     """Récupérer tous les actifs"""
     return db.query(database_models.Asset).all()
 
 
+def get_holdings(db: Session) -> List[Tuple[str, float]]:
+    """Quantité totale détenue par symbole (agrégée en SQL)"""
+    Asset = database_models.Asset
+    return db.query(Asset.symbol, func.sum(Asset.amount))\
+        .group_by(Asset.symbol)\
+        .all()
+
+
+def get_assets_page(
+    db: Session,
+    limit: int,
+    after: Optional[str] = None,
+    symbol: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Récupérer une page d'actifs triés par id (pagination par curseur).
+    Lecture Core sans objets ORM: retourne (lignes ASSET_COLUMNS, curseur suivant ou None).
+    """
+    Asset = database_models.Asset
+    query = select(*[getattr(Asset, column) for column in ASSET_COLUMNS])
+    if symbol:
+        query = query.where(Asset.symbol == symbol)
+    if after:
+        try:
+            (last_id,) = decode_cursor(after)
+            last_id = int(last_id)
+        except (ValueError, TypeError):
+            raise ValueError("Curseur invalide")
+        query = query.where(Asset.id > last_id)
+
+    # Lire un élément de plus pour savoir s'il existe une page suivante
+    rows = db.execute(query.order_by(Asset.id.asc()).limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
+
+
 def get_asset_by_id(db: Session, asset_id: int) -> Optional[database_models.Asset]:
     """Récupérer un actif par son ID"""
     return db.query(database_models.Asset).filter(database_models.Asset.id == asset_id).first()
@@ -64,6 +183,8 @@ def create_alert(db: Session, alert: models.AlertCreate) -> database_models.Pric
         symbol=alert.symbol,
         target_price=alert.target_price,
         condition=alert.condition,
+        percent=alert.percent,
+        window_seconds=alert.window_seconds,
         status="active"
     )
     db.add(db_alert)
@@ -72,12 +193,101 @@ def create_alert(db: Session, alert: models.AlertCreate) -> database_models.Pric
     return db_alert
 
 
+def bulk_create_alerts(
+    db: Session,
+    alerts: Iterable[models.AlertCreate],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """Importer des alertes en masse (une transaction, insertions par paquets)"""
+    now = datetime.utcnow()
+    rows = (
+        {
+            "symbol": alert.symbol,
+            "target_price": alert.target_price,
+            "condition": alert.condition,
+            "percent": alert.percent,
+            "window_seconds": alert.window_seconds,
+            "status": "active",
+            "created_at": now
+        }
+        for alert in alerts
+    )
+    return _bulk_insert(db, database_models.PriceAlert.__table__, rows, chunk_size)
+
+
 def get_alerts(db: Session, status: Optional[str] = None) -> List[database_models.PriceAlert]:
     """Récupérer les alertes, optionnellement filtrées par statut"""
     query = db.query(database_models.PriceAlert)
     if status:
         query = query.filter(database_models.PriceAlert.status == status)
-    return query.order_by(database_models.PriceAlert.created_at.desc()).all()
+    return query.order_by(
+        database_models.PriceAlert.created_at.desc(),
+        database_models.PriceAlert.id.desc()
+    ).all()
+
+
+def _alerts_page_query(
+    db: Session,
+    model,
+    limit: int,
+    after: Optional[Tuple[datetime, int]],
+    status: Optional[str],
+    symbol: Optional[str]
+) -> list:
+    """Lire limit + 1 alertes d'une table (price_alerts ou alert_history) après le curseur"""
+    query = select(*[getattr(model, column) for column in ALERT_COLUMNS])
+    if status:
+        query = query.where(model.status == status)
+    if symbol:
+        query = query.where(model.symbol == symbol)
+    if after:
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(*after))
+    return db.execute(
+        query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+    ).all()
+
+
+def get_alerts_page(
+    db: Session,
+    limit: int,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    symbol: Optional[str] = None,
+    source: str = "live"
+) -> Tuple[list, Optional[str]]:
+    """
+    Récupérer une page d'alertes triées par (created_at, id) décroissants.
+    Le curseur porte la clé du dernier élément: le coût ne dépend pas de la
+    profondeur de la page. source: "live" (price_alerts), "history"
+    (alert_history) ou "all" (fusion des deux, les id étant uniques).
+    Lecture Core sans objets ORM: retourne (lignes ALERT_COLUMNS, curseur suivant ou None).
+    """
+    key = None
+    if after:
+        try:
+            created_at, last_id = decode_cursor(after)
+            key = (datetime.fromisoformat(created_at), int(last_id))
+        except (ValueError, TypeError):
+            raise ValueError("Curseur invalide")
+
+    tables = {
+        "live": [database_models.PriceAlert],
+        "history": [database_models.AlertHistory],
+        "all": [database_models.PriceAlert, database_models.AlertHistory],
+    }
+    if source not in tables:
+        raise ValueError(f"Source inconnue: {source}")
+
+    rows = []
+    for model in tables[source]:
+        rows.extend(_alerts_page_query(db, model, limit, key, status, symbol))
+    if len(tables[source]) > 1:
+        rows.sort(key=lambda a: (a.created_at, a.id), reverse=True)
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, None
 
 
 def get_alert_by_id(db: Session, alert_id: int) -> Optional[database_models.PriceAlert]:
@@ -97,6 +307,66 @@ def update_alert_status(db: Session, alert_id: int, status: str) -> Optional[dat
     return db_alert
 
 
+def apply_alert_tick(
+    db: Session,
+    triggered: List[dict],
+    references: List[Tuple[int, float]]
+) -> List[dict]:
+    """
+    Appliquer le résultat d'une évaluation en une seule transaction:
+    passage en "triggered" des alertes déclenchées, écriture de leur
+    déclenchement dans alert_triggers et sauvegarde des plus hauts/bas suivis des stops suiveurs.
+    Retourne les déclenchements réellement enregistrés (alertes encore
+    actives en base), à notifier par le worker.
+
+    Chaque déclenchement reçoit sa propre clé d'idempotence
+    ("alert:<id>:<uuid>"), réutilisée à chaque tentative de livraison:
+    un id d'alerte réutilisé ou une alerte réactivée ne peut pas entrer
+    en conflit avec un déclenchement déjà journalisé.
+    """
+    PriceAlert = database_models.PriceAlert.__table__
+    recorded = []
+    if not triggered and not references:
+        return recorded
+    try:
+        if triggered:
+            now = datetime.utcnow()
+            by_id = {t["alert_id"]: t for t in triggered}
+            flipped = db.execute(
+                update(PriceAlert)
+                .where(PriceAlert.c.id.in_(list(by_id)), PriceAlert.c.status == "active")
+                .values(status="triggered", triggered_at=now)
+                .returning(PriceAlert.c.id)
+            ).scalars().all()
+            recorded = [by_id[alert_id] for alert_id in sorted(flipped)]
+            if recorded:
+                db.execute(insert(database_models.AlertTrigger.__table__), [
+                    {
+                        "idempotency_key": f"alert:{t['alert_id']}:{uuid.uuid4().hex}",
+                        "alert_id": t["alert_id"],
+                        "symbol": t["symbol"],
+                        "condition": t["condition"],
+                        "threshold": t["threshold"],
+                        "current_price": t["current_price"],
+                        "triggered_at": now,
+                        "attempts": 0,
+                    }
+                    for t in recorded
+                ])
+        if references:
+            db.execute(
+                update(PriceAlert)
+                .where(PriceAlert.c.id == bindparam("alert_id"))
+                .values(reference_price=bindparam("ref")),
+                [{"alert_id": alert_id, "ref": ref} for alert_id, ref in references]
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return recorded
+
+
 def delete_alert(db: Session, alert_id: int) -> bool:
     """Supprimer une alerte"""
     db_alert = get_alert_by_id(db, alert_id)
@@ -107,6 +377,141 @@ def delete_alert(db: Session, alert_id: int) -> bool:
     return False
 
 
+def archive_alerts(db: Session, older_than_days: int, batch_size: int = BULK_CHUNK_SIZE) -> int:
+    """
+    Déplacer les alertes déclenchées/annulées plus anciennes que X jours
+    vers alert_history, par lots (une transaction par lot).
+
+    Une alerte dont l'id est déjà archivé (id réutilisé par une table
+    price_alerts créée sans AUTOINCREMENT) reste dans price_alerts: elle
+    n'est ni écrasée ni bloquante pour les lots suivants.
+    """
+    PriceAlert = database_models.PriceAlert
+    AlertHistory = database_models.AlertHistory
+    cutoff_date = datetime.utcnow() - timedelta(days=older_than_days)
+    columns = [
+        "id", "symbol", "target_price", "condition", "percent", "window_seconds",
+        "reference_price", "status", "created_at", "triggered_at"
+    ]
+    archived = 0
+
+    while True:
+        ids = [
+            row.id for row in db.query(PriceAlert.id)
+            .filter(PriceAlert.status.in_(["triggered", "cancelled"]))
+            .filter(func.coalesce(PriceAlert.triggered_at, PriceAlert.created_at) < cutoff_date)
+            .filter(~select(AlertHistory.id).where(AlertHistory.id == PriceAlert.id).exists())
+            .order_by(PriceAlert.id)
+            .limit(batch_size)
+        ]
+        if not ids:
+            return archived
+
+        try:
+            db.execute(
+                insert(AlertHistory.__table__).from_select(
+                    columns + ["archived_at"],
+                    select(*[getattr(PriceAlert, c) for c in columns], literal(datetime.utcnow()))
+                    .where(PriceAlert.id.in_(ids))
+                )
+            )
+            db.query(PriceAlert).filter(PriceAlert.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        archived += len(ids)
+
+
+# ==================== ALERT TRIGGER LOG ====================
+
+def claim_alert_triggers(db: Session, limit: int, lease_seconds: float, max_attempts: int) -> list:
+    """
+    Réserver jusqu'à limit déclenchements à notifier (non livrés, échéance
+    passée, tentatives restantes) en une requête: la tentative est comptée
+    et la ligne n'est plus proposée avant la fin du bail.
+    """
+    Trigger = database_models.AlertTrigger.__table__
+    now = datetime.utcnow()
+    due = select(Trigger.c.id)\
+        .where(
+            Trigger.c.delivered_at.is_(None),
+            Trigger.c.attempts < max_attempts,
+            (Trigger.c.next_attempt_at.is_(None)) | (Trigger.c.next_attempt_at <= now)
+        )\
+        .order_by(Trigger.c.id)\
+        .limit(limit)
+    try:
+        rows = db.execute(
+            update(Trigger)
+            .where(Trigger.c.id.in_(due.scalar_subquery()))
+            .values(attempts=Trigger.c.attempts + 1, next_attempt_at=now + timedelta(seconds=lease_seconds))
+            .returning(
+                Trigger.c.id, Trigger.c.idempotency_key, Trigger.c.alert_id, Trigger.c.symbol,
+                Trigger.c.condition, Trigger.c.threshold, Trigger.c.current_price,
+                Trigger.c.triggered_at, Trigger.c.attempts
+            )
+        ).all()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return sorted(rows, key=lambda row: row.id)
+
+
+def mark_alert_triggers_delivered(db: Session, trigger_ids: List[int]) -> int:
+    """Marquer des déclenchements comme notifiés"""
+    if not trigger_ids:
+        return 0
+    Trigger = database_models.AlertTrigger.__table__
+    result = db.execute(
+        update(Trigger)
+        .where(Trigger.c.id.in_(trigger_ids))
+        .values(delivered_at=datetime.utcnow(), last_error=None)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def mark_alert_triggers_failed(db: Session, failures: List[Tuple[int, str, datetime]]) -> None:
+    """Enregistrer les échecs de notification (id, erreur, prochaine tentative)"""
+    if not failures:
+        return
+    Trigger = database_models.AlertTrigger.__table__
+    db.execute(
+        update(Trigger)
+        .where(Trigger.c.id == bindparam("trigger_id"))
+        .values(last_error=bindparam("error"), next_attempt_at=bindparam("retry_at")),
+        [
+            {"trigger_id": trigger_id, "error": error[:500], "retry_at": retry_at}
+            for trigger_id, error, retry_at in failures
+        ]
+    )
+    db.commit()
+
+
+def get_alert_trigger_stats(db: Session, max_attempts: int) -> dict:
+    """Nombre de déclenchements livrés, en attente et abandonnés"""
+    Trigger = database_models.AlertTrigger
+    delivered = db.query(func.count(Trigger.id)).filter(Trigger.delivered_at.isnot(None)).scalar()
+    pending = db.query(func.count(Trigger.id))\
+        .filter(Trigger.delivered_at.is_(None), Trigger.attempts < max_attempts).scalar()
+    failed = db.query(func.count(Trigger.id))\
+        .filter(Trigger.delivered_at.is_(None), Trigger.attempts >= max_attempts).scalar()
+    return {"delivered": delivered, "pending": pending, "failed": failed}
+
+
+def purge_alert_triggers(db: Session, older_than_days: int) -> int:
+    """Supprimer les déclenchements livrés depuis plus de X jours"""
+    Trigger = database_models.AlertTrigger
+    cutoff_date = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = db.query(Trigger)\
+        .filter(Trigger.delivered_at.isnot(None), Trigger.delivered_at < cutoff_date)\
+        .delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
 # ==================== PORTFOLIO HISTORY OPERATIONS ====================
 
 def create_portfolio_history(db: Session, total_value: float) -> database_models.PortfolioHistory:
@@ -120,6 +525,19 @@ def create_portfolio_history(db: Session, total_value: float) -> database_models
     return db_history
 
 
+def bulk_create_portfolio_history(
+    db: Session,
+    snapshots: Iterable[Tuple[datetime, float]],
+    chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """Insérer des snapshots (timestamp, valeur) par paquets, en une transaction"""
+    rows = (
+        {"timestamp": timestamp, "total_value_usd": total_value}
+        for timestamp, total_value in snapshots
+    )
+    return _bulk_insert(db, database_models.PortfolioHistory.__table__, rows, chunk_size)
+
+
 def get_portfolio_history(db: Session, days: int = 7) -> List[database_models.PortfolioHistory]:
     """Récupérer l'historique du portefeuille sur X jours"""
     cutoff_date = datetime.utcnow() - timedelta(days=days)
@@ -129,6 +547,21 @@ def get_portfolio_history(db: Session, days: int = 7) -> List[database_models.Po
         .all()
 
 
+def get_portfolio_series(db: Session, days: int = 7) -> List[Tuple[datetime, float]]:
+    """Récupérer la série (timestamp, valeur) sans construire d'objets ORM"""
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    History = database_models.PortfolioHistory
+    return db.query(History.timestamp, History.total_value_usd)\
+        .filter(History.timestamp >= cutoff_date)\
+        .order_by(History.timestamp.asc())\
+        .all()
+
+
+def get_latest_snapshot_id(db: Session) -> Optional[int]:
+    """Id du dernier snapshot enregistré (clé d'invalidation des analyses)"""
+    return db.query(func.max(database_models.PortfolioHistory.id)).scalar()
+
+
 def get_latest_portfolio_value(db: Session) -> Optional[database_models.PortfolioHistory]:
     """Récupérer la dernière valeur enregistrée du portefeuille"""
     return db.query(database_models.PortfolioHistory)\
@@ -136,10 +569,11 @@ def get_latest_portfolio_value(db: Session) -> Optional[database_models.Portfoli
         .first()
 
 
-def cleanup_old_history(db: Session, days: int = 30):
+def cleanup_old_history(db: Session, days: int = 30) -> int:
     """Nettoyer l'historique plus ancien que X jours (maintenance)"""
     cutoff_date = datetime.utcnow() - timedelta(days=days)
-    db.query(database_models.PortfolioHistory)\
+    deleted = db.query(database_models.PortfolioHistory)\
         .filter(database_models.PortfolioHistory.timestamp < cutoff_date)\
         .delete()
-    db.commit()
\ No newline at end of file
+    db.commit()
+    return deleted
\ No newline at end of file
@@ -1,5 +1,5 @@
 # database_models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import enum
@@ -10,6 +10,10 @@ Base = declarative_base()
 class Asset(Base):
     """Modèle pour les actifs du portefeuille"""
     __tablename__ = "assets"
+    __table_args__ = (
+        # Pagination par curseur filtrée par symbole
+        Index("ix_assets_symbol_id", "symbol", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(10), nullable=False, index=True)  # BTC, ETH, SOL
@@ -25,6 +29,10 @@ class AlertCondition(str, enum.Enum):
     """Conditions possibles pour les alertes"""
     ABOVE = "above"
     BELOW = "below"
+    CROSS_UP = "cross_up"
+    CROSS_DOWN = "cross_down"
+    PCT_CHANGE = "pct_change"
+    TRAILING = "trailing"
 
 
 class AlertStatus(str, enum.Enum):
@@ -37,11 +45,23 @@ class AlertStatus(str, enum.Enum):
 class PriceAlert(Base):
     """Modèle pour les alertes de prix"""
     __tablename__ = "price_alerts"
+    __table_args__ = (
+        # Index composites pour la pagination par curseur (created_at DESC, id DESC)
+        Index("ix_price_alerts_created_id", "created_at", "id"),
+        Index("ix_price_alerts_status_created_id", "status", "created_at", "id"),
+        Index("ix_price_alerts_symbol_created_id", "symbol", "created_at", "id"),
+        # Ne jamais réutiliser un id: les alertes archivées le conservent.
+        # Une table existante est reconstruite par migrations.upgrade_schema
+        {"sqlite_autoincrement": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(10), nullable=False, index=True)
-    target_price = Column(Float, nullable=False)
-    condition = Column(String(10), nullable=False)  # "above" ou "below"
+    target_price = Column(Float, nullable=True)  # Absent pour pct_change / trailing
+    condition = Column(String(10), nullable=False)  # Voir AlertCondition
+    percent = Column(Float, nullable=True)  # Seuil en % (pct_change, trailing)
+    window_seconds = Column(Integer, nullable=True)  # Fenêtre (pct_change)
+    reference_price = Column(Float, nullable=True)  # Plus haut/bas suivi (trailing)
     status = Column(String(20), default="active", index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     triggered_at = Column(DateTime, nullable=True)
@@ -50,6 +70,61 @@ class PriceAlert(Base):
         return f"<PriceAlert(symbol={self.symbol}, target={self.target_price}, status={self.status})>"
 
 
+class AlertHistory(Base):
+    """Archive des alertes déclenchées ou annulées (même id que dans price_alerts)"""
+    __tablename__ = "alert_history"
+    __table_args__ = (
+        Index("ix_alert_history_created_id", "created_at", "id"),
+        Index("ix_alert_history_status_created_id", "status", "created_at", "id"),
+        Index("ix_alert_history_symbol_created_id", "symbol", "created_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    symbol = Column(String(10), nullable=False)
+    target_price = Column(Float, nullable=True)
+    condition = Column(String(10), nullable=False)
+    percent = Column(Float, nullable=True)
+    window_seconds = Column(Integer, nullable=True)
+    reference_price = Column(Float, nullable=True)
+    status = Column(String(20), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+    triggered_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<AlertHistory(symbol={self.symbol}, target={self.target_price}, status={self.status})>"
+
+
+class AlertTrigger(Base):
+    """
+    Journal des déclenchements (écrit dans la même transaction que le passage
+    en "triggered"), vidé par le worker de notifications: livraison au moins
+    une fois. Une seule ligne par déclenchement: seule une alerte encore
+    "active" est journalisée (crud.apply_alert_tick). La clé d'idempotence,
+    propre à chaque ligne, permet au destinataire d'ignorer les renvois.
+    """
+    __tablename__ = "alert_triggers"
+    __table_args__ = (
+        Index("ix_alert_triggers_pending", "delivered_at", "next_attempt_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(64), nullable=False, unique=True)  # "alert:<id>:<uuid>"
+    alert_id = Column(Integer, nullable=False, index=True)
+    symbol = Column(String(10), nullable=False)
+    condition = Column(String(10), nullable=False)
+    threshold = Column(Float, nullable=True)
+    current_price = Column(Float, nullable=False)
+    triggered_at = Column(DateTime, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)  # Bail en cours ou prochaine tentative
+    delivered_at = Column(DateTime, nullable=True)
+    last_error = Column(String(500), nullable=True)
+    
+    def __repr__(self):
+        return f"<AlertTrigger(key={self.idempotency_key}, delivered={self.delivered_at is not None})>"
+
+
 class PortfolioHistory(Base):
     """Modèle pour l'historique de valeur du portefeuille"""
     __tablename__ = "portfolio_history"
@@ -1,120 +1,362 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, UploadFile, File, Query, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Literal, Optional
+from datetime import datetime, timedelta, timezone
 import requests
 from functools import lru_cache
 import os
 from dotenv import load_dotenv
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import time
+import numpy as np
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Charger les variables d'environnement (avant les modules qui les lisent)
+load_dotenv()
+
 from database import get_db, engine
 import database_models
 import models
 import crud
+import bulk_import
+import alert_engine
+import quotes
+import analytics
+import tick_store
+import backtest
+import symbol_map
+import admission
+import snapshots
+import serializers
+import profiling
+import migrations
+
+# Créer les tables au démarrage uniquement si demandé (sinon schéma géré à part)
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "false").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cycle de vie: démarrage rapide, préchauffage en arrière-plan, arrêt propre"""
+    await run_in_threadpool(startup_event)
+    yield
+    await run_in_threadpool(shutdown_event)
 
-# Charger les variables d'environnement
-load_dotenv()
 
-# Créer les tables
-database_models.Base.metadata.create_all(bind=engine)
+app = FastAPI(title="Crypto-Tracker & Alert Manager", version="1.0.0", lifespan=lifespan)
 
-app = FastAPI(title="Crypto-Tracker & Alert Manager", version="1.0.0")
+# Contrôle d'admission des routes dépendant de CoinMarketCap: limite de
+# concurrence par classe, file bornée, puis 503 + Retry-After ou réponse
+# GET précédente (périmée) quand le backend est saturé
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))  # Attente max en file (secondes)
+ADMISSION_STALE_MAX_AGE = int(os.getenv("ADMISSION_STALE_MAX_AGE", "900"))  # Âge max d'une réponse resservie
+admission_control = admission.AdmissionControl(
+    limiters={
+        "quotes": admission.Limiter(
+            concurrency=int(os.getenv("ADMISSION_QUOTES_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("ADMISSION_QUOTES_QUEUE", "32")),
+            queue_timeout=ADMISSION_QUEUE_TIMEOUT
+        ),
+        "market": admission.Limiter(
+            concurrency=int(os.getenv("ADMISSION_MARKET_CONCURRENCY", "2")),
+            max_queue=int(os.getenv("ADMISSION_MARKET_QUEUE", "8")),
+            queue_timeout=ADMISSION_QUEUE_TIMEOUT
+        ),
+    },
+    routes={
+        "/portfolio/valuation": "quotes",
+        "/portfolio/diversification": "quotes",
+        "/portfolio/history/save": "quotes",
+        "/alerts/check": "quotes",
+        "/dashboard": "quotes",
+        "/market/top": "market",
+    },
+    stale_max_age=ADMISSION_STALE_MAX_AGE
+)
+
+# Profilage par échantillonnage, activable à chaud (/admin/profiling ou en-tête
+# X-Profile). Ajouté avant l'admission: les requêtes rejetées ne sont pas profilées.
+# PROFILE_TOKEN: jeton exigé par /admin/profiling (désactivé sans jeton)
+profiler = profiling.SamplingProfiler(
+    output_dir=os.getenv("PROFILE_DIR", "./profiles"),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0.01")),  # Fraction des requêtes une fois activé
+    interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,  # Période d'échantillonnage
+    # En-tête X-Profile désactivé par défaut; avec PROFILE_TOKEN, sa valeur doit être ce jeton
+    allow_header=os.getenv("PROFILE_ALLOW_HEADER", "false").lower() == "true",
+    token=os.getenv("PROFILE_TOKEN") or None
+)
+profiler.configure(enabled=os.getenv("PROFILE_ENABLED", "false").lower() == "true")
+app.add_middleware(profiling.ProfilingMiddleware, profiler=profiler)
+app.add_middleware(admission.AdmissionMiddleware, control=admission_control)
 
-# Configuration CORS
+# Configuration CORS (ajouté en dernier: englobe aussi les réponses 503)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Permettre tous les origins (à adapter en production)
     allow_credentials=True,
     allow_methods=["*"],  # Permettre toutes les méthodes HTTP
     allow_headers=["*"],  # Permettre tous les headers
+    expose_headers=["X-Next-Cursor"],  # Curseur de pagination lisible par le front
 )
 
 # Configuration
 COINMARKETCAP_API_KEY = os.getenv("COINMARKETCAP_API_KEY", "your_api_key_here")
 COINMARKETCAP_BASE_URL = "https://pro-api.coinmarketcap.com/v1"
 
-# Cache simple en mémoire (pour production, utilisez Redis)
-price_cache = {}
+# Taux sans risque annuel pour le ratio de Sharpe (ex: 0.04 pour 4%)
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0"))
+
+# Cache du top du marché ({limite: (top, reçu_à)})
+market_cache = {}
+
+# Découpage des appels de cotations pour les grands ensembles de symboles
+QUOTE_CHUNK_SIZE = int(os.getenv("QUOTE_CHUNK_SIZE", "100"))  # Symboles par appel
+QUOTE_FETCH_CONCURRENCY = int(os.getenv("QUOTE_FETCH_CONCURRENCY", "4"))  # Appels simultanés max
+quote_executor = ThreadPoolExecutor(max_workers=QUOTE_FETCH_CONCURRENCY, thread_name_prefix="quotes")
+
+# Évaluation des alertes sur un seul thread: les mises à jour de prix sont
+# appliquées à l'index une par une, dans l'ordre de réception
+alert_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alerts")
+pending_symbols = set()  # Symboles modifiés en attente d'évaluation
+pending_lock = threading.Lock()
+
+# Correspondance symbole -> id CoinMarketCap
+SYMBOL_MAP_PAGE_SIZE = 5000
+SYMBOL_MAP_REFRESH_INTERVAL = 24 * 3600  # Une fois par jour
+
+# Pagination des listes
+DEFAULT_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Table des cotations en mémoire, par symbole (pour production, utilisez Redis)
+quote_table = quotes.QuoteTable()
 CACHE_DURATION = 300  # 5 minutes
 
+# Historique local de toutes les cotations reçues (segments journaliers memmap)
+TICK_STORE_ENABLED = os.getenv("TICK_STORE_ENABLED", "true").lower() == "true"
+ticks = tick_store.TickStore(os.getenv("TICK_STORE_DIR", "./tick_store")) if TICK_STORE_ENABLED else None
+
 # ==================== SCHEDULER POUR ALERTES ====================
 
 scheduler = BackgroundScheduler()
-ALERT_CHECK_INTERVAL = 60  # Vérifier les alertes toutes les 60 secondes
+ALERT_CHECK_INTERVAL = 60  # Rafraîchir chaque symbole sous alerte au moins toutes les 60 secondes
 
-def get_crypto_prices(symbols: List[str]) -> dict:
-    """Récupère les prix de plusieurs cryptos en un seul appel (batching)"""
-    cache_key = ",".join(sorted(symbols))
-    current_time = datetime.now()
-    
-    # Vérifier le cache
-    if cache_key in price_cache:
-        cached_data, cached_time = price_cache[cache_key]
-        if (current_time - cached_time).seconds < CACHE_DURATION:
-            return cached_data
-    
-    # Appel API groupé - v2 pour multiple symbols
-    symbols_str = ",".join(symbols)
+# Rafraîchissement adaptatif: plus une alerte est proche de son seuil
+# (distance relative au prix), plus son symbole est rafraîchi souvent
+QUOTE_REFRESH_TICK = 10  # Période du job de rafraîchissement (secondes)
+ALERT_REFRESH_TIERS = [
+    (0.005, 10),  # à moins de 0,5% du seuil: toutes les 10s
+    (0.02, 30),   # à moins de 2%: toutes les 30s
+]
+refresh_attempts: Dict[str, float] = {}  # Dernière demande de cotation par symbole (job de rafraîchissement)
+
+# Index en mémoire des alertes actives (colonnes NumPy, évaluation vectorielle)
+alert_index = alert_engine.AlertEngine()
+
+# Archivage des alertes déclenchées/annulées vers alert_history
+ALERT_ARCHIVE_AGE_DAYS = int(os.getenv("ALERT_ARCHIVE_AGE_DAYS", "7"))
+ALERT_ARCHIVE_BATCH_SIZE = int(os.getenv("ALERT_ARCHIVE_BATCH_SIZE", "500"))
+ALERT_ARCHIVE_INTERVAL = 3600  # Toutes les heures
+
+# Notifications: journal des déclenchements (alert_triggers) vidé par un worker,
+# livraison au moins une fois (clé d'idempotence transmise pour la déduplication)
+NOTIFICATION_INTERVAL = int(os.getenv("NOTIFICATION_INTERVAL", "15"))  # Reprise des notifications en attente
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_LEASE_SECONDS = 60  # Un déclenchement réservé n'est pas reproposé avant ce délai
+NOTIFICATION_RETRY_DELAY = 30  # Délai avant nouvelle tentative, doublé à chaque échec
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "8"))
+notification_lock = threading.Lock()  # Un seul worker de notifications à la fois
+
+# Snapshots de la valeur du portefeuille (mis en tampon, insérés par paquets).
+# Snapshots périodiques désactivés par défaut (SNAPSHOT_INTERVAL=0)
+SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", "0"))  # Secondes entre deux snapshots
+# Purge quotidienne de l'historique désactivée par défaut (HISTORY_RETENTION_DAYS=0: tout conserver)
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "0"))  # Âge max des snapshots (jours)
+HISTORY_CLEANUP_INTERVAL = 24 * 3600  # Une fois par jour
+snapshot_service = snapshots.SnapshotService(
+    price_source=lambda symbols: get_crypto_prices(symbols),
+    fetched_at=quote_table.fetched_at,
+    flush_size=int(os.getenv("SNAPSHOT_FLUSH_SIZE", "30")),  # Snapshots par insertion
+    flush_interval=int(os.getenv("SNAPSHOT_FLUSH_INTERVAL", "300"))  # Délai max avant écriture
+)
+
+def _request_quotes(params: dict) -> dict:
+    """Appel groupé à /cryptocurrency/quotes/latest, retourne le champ data"""
     url = f"{COINMARKETCAP_BASE_URL}/cryptocurrency/quotes/latest"
     headers = {
         "X-CMC_PRO_API_KEY": COINMARKETCAP_API_KEY,
         "Accept": "application/json"
     }
-    params = {"symbol": symbols_str, "convert": "USD"}
+    response = requests.get(url, headers=headers, params={**params, "convert": "USD"}, timeout=10.0)
     
-    try:
-        response = requests.get(url, headers=headers, params=params, timeout=10.0)
-        
-        if response.status_code != 200:
-            error_detail = f"CoinMarketCap API Error: {response.status_code} - {response.text}"
-            print(error_detail)  # Pour debug
-            raise HTTPException(
-                status_code=502, 
-                detail=f"Erreur API CoinMarketCap (Code: {response.status_code})"
-            )
-        
-        data = response.json()
-        
-        # Parse response (même logique que le script de test)
-        prices = {}
-        for symbol in symbols:
-            if symbol in data.get("data", {}):
-                crypto_data = data["data"][symbol]
-                
-                # V2 peut retourner un tableau, prendre le premier élément
-                if isinstance(crypto_data, list):
-                    crypto_data = crypto_data[0] if crypto_data else None
-                
-                if crypto_data and "quote" in crypto_data and "USD" in crypto_data["quote"]:
-                    prices[symbol] = {
-                        "price": crypto_data["quote"]["USD"]["price"],
-                        "percent_change_24h": crypto_data["quote"]["USD"]["percent_change_24h"],
-                        "market_cap": crypto_data["quote"]["USD"]["market_cap"]
-                    }
-        
-        # Mettre en cache
-        price_cache[cache_key] = (prices, current_time)
-        return prices
-        
-    except requests.Timeout:
-        raise HTTPException(status_code=504, detail="Timeout lors de l'appel à CoinMarketCap")
-    except requests.RequestException as e:
+    if response.status_code != 200:
+        error_detail = f"CoinMarketCap API Error: {response.status_code} - {response.text}"
+        print(error_detail)  # Pour debug
+        raise HTTPException(
+            status_code=502, 
+            detail=f"Erreur API CoinMarketCap (Code: {response.status_code})"
+        )
+    
+    return response.json().get("data", {})
+
+
+def _parse_quote(crypto_data) -> Optional[dict]:
+    """Extraire prix, variation 24h et capitalisation d'une entrée de l'API"""
+    # La recherche par symbole peut retourner un tableau, prendre le premier élément
+    if isinstance(crypto_data, list):
+        crypto_data = crypto_data[0] if crypto_data else None
+    
+    if crypto_data and "quote" in crypto_data and "USD" in crypto_data["quote"]:
+        return {
+            "price": crypto_data["quote"]["USD"]["price"],
+            "percent_change_24h": crypto_data["quote"]["USD"]["percent_change_24h"],
+            "market_cap": crypto_data["quote"]["USD"]["market_cap"]
+        }
+    return None
+
+
+def _fetch_quote_chunk(chunk: List[tuple]) -> Dict[str, dict]:
+    """
+    Récupérer un paquet de cotations. chunk: [(clé, symbole)] où la clé est
+    l'id CoinMarketCap (int) ou, pour un symbole non résolu, le ticker.
+    """
+    param = "id" if isinstance(chunk[0][0], int) else "symbol"
+    data = _request_quotes({param: ",".join(str(key) for key, _ in chunk)})
+    prices = {}
+    for key, symbol in chunk:
+        quote = _parse_quote(data.get(str(key)))
+        if quote:
+            prices[symbol] = quote
+    return prices
+
+
+def _to_http_error(e: Exception) -> HTTPException:
+    """Traduire une erreur d'appel à CoinMarketCap en réponse HTTP"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, requests.Timeout):
+        return HTTPException(status_code=504, detail="Timeout lors de l'appel à CoinMarketCap")
+    if isinstance(e, requests.RequestException):
         print(f"Erreur requête: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erreur lors de la requête: {str(e)}")
-    except KeyError as e:
+        return HTTPException(status_code=500, detail=f"Erreur lors de la requête: {str(e)}")
+    if isinstance(e, KeyError):
         print(f"Erreur parsing JSON: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Format de réponse inattendu de l'API")
-    except Exception as e:
-        print(f"Erreur inattendue: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+        return HTTPException(status_code=500, detail=f"Format de réponse inattendu de l'API")
+    print(f"Erreur inattendue: {str(e)}")
+    return HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+
+
+def get_crypto_prices(symbols: List[str], max_age: float = CACHE_DURATION, notify: bool = True) -> dict:
+    """
+    Récupère les prix de plusieurs cryptos par appels groupés (batching).
+    Seuls les symboles absents de la table des cotations ou plus vieux que
+    max_age secondes sont demandés à l'API, par identifiant CoinMarketCap
+    quand le symbole est résolu (par ticker sinon). Les grands ensembles sont
+    découpés en paquets récupérés en parallèle; un paquet en échec se rabat
+    sur les dernières cotations connues de ses propres symboles.
+    notify=False: les abonnés de la table ne sont pas prévenus (l'appelant
+    évalue lui-même les alertes).
+    """
+    fresh, missing = quote_table.lookup(symbols, max_age)
+    if not missing:
+        return fresh
+    
+    by_id, by_symbol = [], []
+    for symbol in missing:
+        cmc_id = symbol_map.registry.resolve(symbol)
+        if cmc_id is None:
+            by_symbol.append((symbol, symbol))
+        else:
+            by_id.append((cmc_id, symbol))
+    chunks = [
+        keys[i:i + QUOTE_CHUNK_SIZE]
+        for keys in (by_id, by_symbol)
+        for i in range(0, len(keys), QUOTE_CHUNK_SIZE)
+    ]
+    
+    # Un seul paquet: appel direct, sans passer par le pool de threads
+    if len(chunks) == 1:
+        futures = None
+    else:
+        futures = [quote_executor.submit(_fetch_quote_chunk, chunk) for chunk in chunks]
+    
+    prices = {}
+    errors = []
+    for position, chunk in enumerate(chunks):
+        try:
+            result = futures[position].result() if futures else _fetch_quote_chunk(chunk)
+            prices.update(result)
+        except Exception as e:
+            errors.append(e)
+            # Dégradation limitée au paquet: cotations périmées de ses symboles
+            stale, _ = quote_table.lookup([symbol for _, symbol in chunk], float("inf"))
+            fresh.update(stale)
+            logger.warning(
+                f"⚠️ Paquet de {len(chunk)} cotation(s) en échec ({type(e).__name__}: {str(e)}), "
+                f"{len(stale)} cotation(s) périmée(s) utilisée(s)"
+            )
+    
+    if errors and not prices and not any(symbol in fresh for symbol in missing):
+        raise _to_http_error(errors[0])
+    
+    # Conserver chaque cotation reçue dans l'historique local
+    if ticks is not None:
+        try:
+            ticks.append(prices)
+        except OSError as e:
+            logger.error(f"Erreur d'écriture dans l'historique des cotations: {str(e)}")
+    
+    # Mettre à jour la table (notifie les abonnés des prix modifiés)
+    quote_table.update(prices, notify=notify)
+    fresh.update(prices)
+    return fresh
+
+
+@profiler.profile_job("refresh_symbol_map")
+def refresh_symbol_map():
+    """
+    Recharger la correspondance symbole -> id CoinMarketCap depuis
+    /cryptocurrency/map (pages de 5000) et la persister localement.
+    """
+    if COINMARKETCAP_API_KEY == "your_api_key_here":
+        logger.info("Clé API absente: correspondance des symboles conservée (hors ligne)")
+        return
+
+    url = f"{COINMARKETCAP_BASE_URL}/cryptocurrency/map"
+    headers = {
+        "X-CMC_PRO_API_KEY": COINMARKETCAP_API_KEY,
+        "Accept": "application/json"
+    }
+    entries = []
+    start = 1
+    try:
+        while True:
+            params = {"listing_status": "active", "start": start, "limit": SYMBOL_MAP_PAGE_SIZE}
+            response = requests.get(url, headers=headers, params=params, timeout=30.0)
+            if response.status_code != 200:
+                logger.error(f"Erreur API CoinMarketCap (map): {response.status_code}")
+                return
+            page = response.json().get("data", [])
+            entries.extend(page)
+            if len(page) < SYMBOL_MAP_PAGE_SIZE:
+                break
+            start += SYMBOL_MAP_PAGE_SIZE
+        
+        symbol_map.registry.update(entries)
+        logger.info(f"🗺️ Correspondance des symboles rafraîchie ({len(symbol_map.registry)} symboles)")
+    except (requests.RequestException, ValueError, OSError) as e:
+        logger.error(f"❌ Erreur lors du rafraîchissement des symboles: {str(e)}")
 
 
 def convert_currency(amount_usd: float, target_currency: str) -> float:
@@ -129,93 +371,440 @@ def convert_currency(amount_usd: float, target_currency: str) -> float:
 
 # ==================== BACKGROUND JOB POUR ALERTES ====================
 
-def check_alerts_background():
+def reload_alert_index(db: Session):
+    """Resynchroniser l'index en mémoire avec les alertes actives en base"""
+    alert_index.load(crud.get_alerts(db, status="active"))
+
+
+def _apply_evaluation(db: Session, prices: Dict[str, float]) -> List[dict]:
+    """
+    Évaluer les alertes pour les prix fournis en un passage vectoriel, puis
+    enregistrer les déclenchements (statut + journal) et l'état des stops
+    suiveurs en une transaction. L'index n'est modifié qu'après la validation:
+    en cas d'échec, le tick suivant est évalué comme si celui-ci n'avait pas
+    eu lieu. Retourne les déclenchements enregistrés.
+    """
+    tick = alert_index.prepare(prices, time.time())
+    recorded = crud.apply_alert_tick(db, tick.triggered, tick.references)
+    alert_index.commit(tick)
+    return recorded
+
+
+def _current_prices(symbols: List[str]) -> Dict[str, float]:
+    """Derniers prix connus de la table des cotations"""
+    prices = {}
+    for symbol in symbols:
+        entry = quote_table.get(symbol)
+        if entry is not None:
+            prices[symbol] = entry[0]["price"]
+    return prices
+
+
+def evaluate_alerts(db: Session) -> List[dict]:
     """
-    Tâche de vérification des alertes en arrière-plan.
-    Exécutée automatiquement toutes les N secondes par le scheduler.
+    Évaluer toutes les alertes actives avec les cotations courantes.
+    Les cotations sont récupérées sans notifier les abonnés (pas d'évaluation
+    concurrente des mêmes prix) puis évaluées sur le thread des alertes.
     """
+    symbols = alert_index.symbols()
+    if not symbols:
+        return []
+
+    prices = get_crypto_prices(symbols, notify=False)
+    prices = {symbol: quote["price"] for symbol, quote in prices.items()}
+    return alert_executor.submit(_apply_evaluation, db, prices).result()
+
+
+@profiler.profile_job("process_price_updates")
+def process_price_updates():
+    """
+    Évaluer les alertes des symboles dont le prix a changé, avec leurs
+    derniers prix connus. Exécutée sur le thread des alertes: les mises à
+    jour rapprochées sont regroupées en une seule évaluation.
+    """
+    with pending_lock:
+        symbols = list(pending_symbols)
+        pending_symbols.clear()
+    if not symbols:
+        return
+
     from database import SessionLocal
     db = SessionLocal()
     try:
-        alerts = crud.get_alerts(db, status="active")
+        triggered = _apply_evaluation(db, _current_prices(symbols))
         
-        if not alerts:
-            logger.debug("Aucune alerte active à vérifier")
-            return
-        
-        symbols = list(set(alert.symbol for alert in alerts))
-        prices = get_crypto_prices(symbols)
-        
-        triggered_count = 0
+        for alert in triggered:
+            logger.warning(
+                f"🚨 ALERTE DÉCLENCHÉE: {alert['symbol']} = {alert['current_price']:.2f}$ "
+                f"(seuil {alert['condition']}: {alert['threshold']:.2f}$)"
+            )
         
-        for alert in alerts:
-            if alert.symbol in prices:
-                current_price = prices[alert.symbol]["price"]
-                
-                should_trigger = False
-                if alert.condition == "above" and current_price >= alert.target_price:
-                    should_trigger = True
-                elif alert.condition == "below" and current_price <= alert.target_price:
-                    should_trigger = True
-                
-                if should_trigger:
-                    # Mettre à jour le statut en base de données
-                    crud.update_alert_status(db, alert.id, "triggered")
-                    triggered_count += 1
-                    
-                    # Envoyer la notification
+        if triggered:
+            logger.info(f"✅ {len(triggered)} alerte(s) déclenchée(s) lors de la vérification")
+            # Les notifications partent du journal, sans ralentir l'évaluation
+            schedule_notification_delivery()
+    
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la vérification automatique des alertes: {str(e)}")
+    finally:
+        db.close()
+
+
+def on_quotes_changed(changed: Dict[str, dict]):
+    """Abonné de la table des cotations: déclenche l'évaluation des symboles modifiés"""
+    watched = set(alert_index.symbols())
+    symbols = [symbol for symbol in changed if symbol in watched]
+    if not symbols:
+        return
+
+    # Hors du thread appelant (requête HTTP ou job) pour ne pas le ralentir;
+    # une seule évaluation en file à la fois
+    with pending_lock:
+        scheduled = bool(pending_symbols)
+        pending_symbols.update(symbols)
+    if not scheduled:
+        alert_executor.submit(process_price_updates)
+
+
+quote_table.subscribe(on_quotes_changed)
+
+
+def schedule_notification_delivery(background_tasks: Optional[BackgroundTasks] = None):
+    """Lancer le worker de notifications sans l'attendre (appels rapprochés fusionnés)"""
+    if scheduler.running:
+        scheduler.add_job(
+            deliver_alert_notifications,
+            id='deliver_alert_notifications_now',
+            replace_existing=True
+        )
+    elif background_tasks is not None:
+        background_tasks.add_task(deliver_alert_notifications)
+    else:
+        deliver_alert_notifications()
+
+
+@profiler.profile_job("deliver_alert_notifications")
+def deliver_alert_notifications():
+    """
+    Worker de notifications: réserve les déclenchements en attente du journal,
+    les notifie puis les marque livrés. Un crash entre l'envoi et le marquage
+    provoque un nouvel envoi après le bail (au moins une fois); le destinataire
+    déduplique grâce à la clé d'idempotence. Les échecs sont retentés avec un
+    délai croissant, jusqu'à NOTIFICATION_MAX_ATTEMPTS tentatives.
+    """
+    if not notification_lock.acquire(blocking=False):
+        return  # Le worker en cours reprendra les nouveaux déclenchements
+
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        while True:
+            batch = crud.claim_alert_triggers(
+                db, NOTIFICATION_BATCH_SIZE, NOTIFICATION_LEASE_SECONDS, NOTIFICATION_MAX_ATTEMPTS
+            )
+            if not batch:
+                break
+
+            delivered, failures = [], []
+            for trigger in batch:
+                try:
                     send_alert_notification(
-                        alert.symbol,
-                        current_price,
-                        alert.target_price
+                        trigger.symbol,
+                        trigger.current_price,
+                        trigger.threshold if trigger.threshold is not None else float("nan"),
+                        idempotency_key=trigger.idempotency_key
                     )
-                    
-                    logger.warning(
-                        f"🚨 ALERTE DÉCLENCHÉE: {alert.symbol} = {current_price:.2f}$ "
-                        f"(seuil {alert.condition}: {alert.target_price:.2f}$)"
+                    delivered.append(trigger.id)
+                except Exception as e:
+                    retry_at = datetime.utcnow() + timedelta(
+                        seconds=NOTIFICATION_RETRY_DELAY * 2 ** (trigger.attempts - 1)
                     )
-        
-        if triggered_count > 0:
-            logger.info(f"✅ {triggered_count} alerte(s) déclenchée(s) lors de la vérification")
-    
+                    failures.append((trigger.id, str(e), retry_at))
+
+            crud.mark_alert_triggers_delivered(db, delivered)
+            crud.mark_alert_triggers_failed(db, failures)
+            if failures:
+                logger.warning(f"⚠️ {len(failures)} notification(s) en échec, nouvelle tentative prévue")
     except Exception as e:
-        logger.error(f"❌ Erreur lors de la vérification automatique des alertes: {str(e)}")
+        logger.error(f"❌ Erreur du worker de notifications: {str(e)}")
+    finally:
+        db.close()
+        notification_lock.release()
+
+
+def refresh_interval(distance: float) -> int:
+    """Intervalle de rafraîchissement d'un symbole selon la proximité de ses seuils"""
+    for max_distance, interval in ALERT_REFRESH_TIERS:
+        if distance < max_distance:
+            return interval
+    return ALERT_CHECK_INTERVAL
+
+
+def refresh_due(symbol: str, distance: float, now: float) -> bool:
+    """
+    Le symbole est-il à rafraîchir ? Un symbole demandé mais non reçu lors
+    de la dernière tentative (inconnu de l'API, paquet en échec) n'est
+    redemandé qu'à l'intervalle de base, quelle que soit sa proximité.
+    """
+    fetched = quote_table.fetched_at(symbol) or 0
+    attempted = refresh_attempts.get(symbol, 0)
+    interval = refresh_interval(distance) if fetched >= attempted else ALERT_CHECK_INTERVAL
+    # Demi-période de tolérance pour ne pas rater l'échéance d'un tick
+    return now - max(fetched, attempted) >= interval - QUOTE_REFRESH_TICK / 2
+
+
+@profiler.profile_job("refresh_quotes_background")
+def refresh_quotes_background():
+    """
+    Tâche de rafraîchissement adaptatif des cotations des symboles sous alerte.
+    Seuls les symboles arrivés à échéance sont demandés à l'API; les prix
+    modifiés déclenchent ensuite l'évaluation via on_quotes_changed.
+    """
+    now = time.time()
+    proximity = alert_index.proximity(now)
+    due = [symbol for symbol, distance in proximity.items() if refresh_due(symbol, distance, now)]
+    # Oublier les symboles qui ne sont plus sous alerte
+    for symbol in [symbol for symbol in refresh_attempts if symbol not in proximity]:
+        del refresh_attempts[symbol]
+    if not due:
+        logger.debug("Aucune cotation à rafraîchir")
+        return
+
+    for symbol in due:
+        refresh_attempts[symbol] = now
+    try:
+        get_crypto_prices(due, max_age=0)
+    except Exception as e:
+        logger.error(f"❌ Erreur lors du rafraîchissement des cotations: {str(e)}")
+
+
+@profiler.profile_job("archive_alerts_background")
+def archive_alerts_background():
+    """
+    Tâche d'archivage: déplace les alertes terminées vers alert_history
+    pour que price_alerts reste proportionnelle aux alertes actives.
+    """
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        archived = crud.archive_alerts(db, ALERT_ARCHIVE_AGE_DAYS, ALERT_ARCHIVE_BATCH_SIZE)
+        if archived > 0:
+            logger.info(f"🗄️ {archived} alerte(s) archivée(s) dans alert_history")
+        purged = crud.purge_alert_triggers(db, ALERT_ARCHIVE_AGE_DAYS)
+        if purged > 0:
+            logger.info(f"🗄️ {purged} déclenchement(s) notifié(s) purgé(s) du journal")
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de l'archivage des alertes: {str(e)}")
+    finally:
+        db.close()
+
+
+@profiler.profile_job("snapshot_portfolio_background")
+def snapshot_portfolio_background():
+    """
+    Tâche de snapshot: met en tampon la valeur courante du portefeuille
+    et insère les snapshots par paquets quand le tampon est plein ou ancien.
+    """
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        snapshot_service.take(db, periodic=True)
+        if snapshot_service.flush_due():
+            snapshot_service.flush(db)
+    except Exception as e:
+        logger.error(f"❌ Erreur lors du snapshot du portefeuille: {str(e)}")
+    finally:
+        db.close()
+
+
+@profiler.profile_job("cleanup_history_background")
+def cleanup_history_background():
+    """Tâche de rétention: supprime les snapshots plus anciens que HISTORY_RETENTION_DAYS"""
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        deleted = crud.cleanup_old_history(db, HISTORY_RETENTION_DAYS)
+        if deleted > 0:
+            logger.info(f"🗄️ {deleted} snapshot(s) de plus de {HISTORY_RETENTION_DAYS} jours supprimé(s)")
+    except Exception as e:
+        logger.error(f"❌ Erreur lors de la purge de l'historique: {str(e)}")
     finally:
         db.close()
 
 
 # ==================== ÉVÉNEMENTS DE CYCLE DE VIE ====================
 
-@app.on_event("startup")
-def startup_event():
-    """Exécuté au démarrage de l'application"""
+# État du préchauffage, exposé par /health/ready
+warmup_state = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "duration_seconds": None,
+    "alerts_indexed": 0,
+    "index_attempts": 0,
+    "quotes_preloaded": 0,
+    "errors": []
+}
+stopping = threading.Event()  # Arrêt demandé (pendant ou après le préchauffage)
+WARMUP_RETRY_DELAY = 1  # Délai avant de retenter le chargement de l'index, doublé à chaque échec
+WARMUP_RETRY_MAX_DELAY = 60
+
+
+def warm_up():
+    """
+    Préchauffage avant d'accepter du trafic: correspondance des symboles,
+    index des alertes, puis cotations de tous les symboles détenus ou sous
+    alerte en un seul appel groupé. Le scheduler démarre ensuite.
+    L'index est indispensable: son chargement est retenté (délai croissant)
+    et l'application reste non prête tant qu'il a échoué.
+    """
+    started = time.time()
+    warmup_state["started_at"] = datetime.utcnow().isoformat()
+    symbol_map.registry.load()
+
+    from database import SessionLocal
+    delay = WARMUP_RETRY_DELAY
+    while True:
+        warmup_state["index_attempts"] += 1
+        db = SessionLocal()
+        try:
+            reload_alert_index(db)
+            warmup_state["alerts_indexed"] = len(alert_index)
+            logger.info(f"📇 Index des alertes chargé ({len(alert_index)} alerte(s) active(s))")
+            symbols = sorted({symbol for symbol, _ in crud.get_holdings(db)} | set(alert_index.symbols()))
+            break
+        except Exception as e:
+            logger.error(f"Erreur au chargement de l'index des alertes (nouvel essai dans {delay}s): {str(e)}")
+            # Seule la dernière erreur d'index est conservée
+            warmup_state["errors"] = [
+                error for error in warmup_state["errors"] if not error.startswith("index:")
+            ] + [f"index: {str(e)}"]
+        finally:
+            db.close()
+        if stopping.wait(delay):
+            return
+        delay = min(delay * 2, WARMUP_RETRY_MAX_DELAY)
+    warmup_state["errors"] = [error for error in warmup_state["errors"] if not error.startswith("index:")]
+
+    # Un échec de l'API n'empêche pas le démarrage: le cache se remplira à la demande
+    if symbols:
+        try:
+            warmup_state["quotes_preloaded"] = len(get_crypto_prices(symbols, max_age=0))
+            logger.info(f"🔥 {warmup_state['quotes_preloaded']}/{len(symbols)} cotation(s) préchargée(s)")
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Erreur au préchargement des cotations: {detail}")
+            warmup_state["errors"].append(f"quotes: {detail}")
+
+    if stopping.is_set():
+        return
+    start_scheduler()
+    # Notifications restées en attente avant l'arrêt précédent
+    schedule_notification_delivery()
+
+    warmup_state["finished_at"] = datetime.utcnow().isoformat()
+    warmup_state["duration_seconds"] = round(time.time() - started, 3)
+    warmup_state["ready"] = True
+    logger.info(f"✅ Préchauffage terminé en {warmup_state['duration_seconds']}s")
+
+
+def start_scheduler():
+    """Planifier les tâches de fond et démarrer le scheduler"""
     try:
         scheduler.add_job(
-            check_alerts_background,
+            refresh_quotes_background,
+            'interval',
+            seconds=QUOTE_REFRESH_TICK,
+            id='refresh_quotes_background_job',
+            name='Rafraîchir les cotations des alertes',
+            replace_existing=True
+        )
+        scheduler.add_job(
+            archive_alerts_background,
+            'interval',
+            seconds=ALERT_ARCHIVE_INTERVAL,
+            id='archive_alerts_background_job',
+            name='Archiver les alertes terminées',
+            replace_existing=True
+        )
+        if SNAPSHOT_INTERVAL > 0:
+            scheduler.add_job(
+                snapshot_portfolio_background,
+                'interval',
+                seconds=SNAPSHOT_INTERVAL,
+                id='snapshot_portfolio_background_job',
+                name='Snapshot de la valeur du portefeuille',
+                replace_existing=True
+            )
+        if HISTORY_RETENTION_DAYS > 0:
+            scheduler.add_job(
+                cleanup_history_background,
+                'interval',
+                seconds=HISTORY_CLEANUP_INTERVAL,
+                id='cleanup_history_background_job',
+                name="Purger l'historique ancien du portefeuille",
+                replace_existing=True
+            )
+        scheduler.add_job(
+            deliver_alert_notifications,
+            'interval',
+            seconds=NOTIFICATION_INTERVAL,
+            id='deliver_alert_notifications_job',
+            name='Envoyer les notifications en attente',
+            replace_existing=True
+        )
+        scheduler.add_job(
+            refresh_symbol_map,
             'interval',
-            seconds=ALERT_CHECK_INTERVAL,
-            id='check_alerts_background_job',
-            name='Vérifier les alertes de prix',
+            seconds=SYMBOL_MAP_REFRESH_INTERVAL,
+            id='refresh_symbol_map_job',
+            name='Rafraîchir la correspondance des symboles',
             replace_existing=True
         )
         scheduler.start()
+        if symbol_map.registry.is_stale():
+            scheduler.add_job(refresh_symbol_map)
         logger.info(
             f"🚀 Scheduler d'alertes DÉMARRÉ "
-            f"(vérification toutes les {ALERT_CHECK_INTERVAL}s)"
+            f"(rafraîchissement adaptatif, au moins toutes les {ALERT_CHECK_INTERVAL}s)"
         )
     except Exception as e:
         logger.error(f"Erreur au démarrage du scheduler: {str(e)}")
 
 
-@app.on_event("shutdown")
+def startup_event():
+    """Exécuté au démarrage: schéma éventuel, puis préchauffage en arrière-plan"""
+    if DB_CREATE_SCHEMA:
+        # Tables existantes mises à niveau, puis tables absentes créées
+        migrations.upgrade_schema(engine)
+        database_models.Base.metadata.create_all(bind=engine)
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+
+
 def shutdown_event():
     """Exécuté à l'arrêt de l'application"""
+    # Ne plus recevoir de trafic pendant l'arrêt
+    stopping.set()
+    warmup_state["ready"] = False
     try:
         if scheduler.running:
             scheduler.shutdown()
             logger.info("🛑 Scheduler d'alertes arrêté")
     except Exception as e:
         logger.error(f"Erreur à l'arrêt du scheduler: {str(e)}")
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        snapshot_service.flush(db)
+    except Exception as e:
+        logger.error(f"Erreur à l'écriture des snapshots en attente: {str(e)}")
+    finally:
+        db.close()
+    quote_executor.shutdown(wait=False)
+    alert_executor.shutdown(wait=False)
+    profiler.flush()
+    if ticks is not None:
+        ticks.close()
 
 
 # Fallback: Arrêter le scheduler en cas de crash
@@ -233,10 +822,100 @@ def add_asset(
     return crud.create_asset(db, asset)
 
 
+@app.post("/portfolio/assets/bulk")
+def add_assets_bulk(
+    assets: List[models.AssetCreate],
+    db: Session = Depends(get_db)
+):
+    """Ajouter plusieurs actifs en une seule transaction"""
+    inserted = crud.bulk_create_assets(db, assets)
+    return {"message": "Import terminé", "inserted": inserted}
+
+
+@app.post("/portfolio/assets/import")
+def import_assets(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Importer des actifs depuis un fichier CSV (colonnes: symbol,amount) ou NDJSON.
+    Le fichier est lu en flux; une ligne invalide annule tout l'import.
+    """
+    inserted = _run_import(file, format, models.AssetCreate, crud.bulk_create_assets, db)
+    return {"message": "Import terminé", "inserted": inserted}
+
+
+def _run_import(file: UploadFile, fmt: Optional[str], model, bulk_create, db: Session) -> int:
+    """Valider le fichier ligne par ligne et l'insérer par paquets"""
+    try:
+        fmt = bulk_import.detect_format(file.filename, file.content_type, fmt)
+        rows = bulk_import.iter_validated(file.file, fmt, model)
+        return bulk_create(db, rows)
+    except bulk_import.ImportRowError as e:
+        raise HTTPException(status_code=422, detail={"line": e.line, "error": e.message})
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _list_response(
+    fetch_page: Callable[[Session, int, Optional[str]], tuple],
+    limit: int,
+    after: Optional[str],
+    format: str,
+    db: Session
+) -> Response:
+    """
+    Réponse d'une route de liste à partir de lignes Core, sans modèles pydantic.
+    json: une page, curseur suivant dans X-Next-Cursor.
+    ndjson: tout le résultat à partir du curseur, diffusé par paquets de
+    MAX_PAGE_SIZE lignes (limit est alors ignoré).
+    """
+    page_size = limit if format == "json" else crud.MAX_PAGE_SIZE
+    try:
+        rows, next_cursor = fetch_page(db, page_size, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "json":
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return serializers.FastJSONResponse(serializers.rows_to_dicts(rows), headers=headers)
+
+    def stream(rows, next_cursor):
+        yield serializers.ndjson_lines(rows)
+        if not next_cursor:
+            return
+        # La session de la requête est fermée pendant la diffusion: pages suivantes sur une session dédiée
+        from database import SessionLocal
+        stream_db = SessionLocal()
+        try:
+            while next_cursor:
+                rows, next_cursor = fetch_page(stream_db, page_size, next_cursor)
+                yield serializers.ndjson_lines(rows)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(stream(rows, next_cursor), media_type="application/x-ndjson")
+
+
 @app.get("/portfolio/assets", response_model=List[models.AssetResponse])
-def list_assets(db: Session = Depends(get_db)):
-    """Lister tous les actifs du portefeuille"""
-    return crud.get_assets(db)
+def list_assets(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    symbol: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db)
+):
+    """
+    Lister les actifs du portefeuille (pagination par curseur).
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    format=ndjson diffuse tous les actifs (une ligne JSON par actif).
+    """
+    symbol = symbol.upper() if symbol else None
+    return _list_response(
+        lambda session, page_size, cursor: crud.get_assets_page(session, page_size, after=cursor, symbol=symbol),
+        limit, after, format, db
+    )
 
 
 @app.delete("/portfolio/assets/{asset_id}")
@@ -247,21 +926,8 @@ def delete_asset(asset_id: int, db: Session = Depends(get_db)):
     return {"message": "Actif supprimé avec succès"}
 
 
-@app.get("/portfolio/valuation")
-def get_portfolio_valuation(
-    currency: str = "USD",
-    db: Session = Depends(get_db)
-):
-    """Obtenir la valorisation totale du portefeuille"""
-    assets = crud.get_assets(db)
-    
-    if not assets:
-        return {"total_value": 0, "currency": currency, "assets": []}
-    
-    # Récupérer tous les symboles uniques
-    symbols = list(set(asset.symbol for asset in assets))
-    prices = get_crypto_prices(symbols)
-    
+def compute_valuation(assets: list, prices: dict, currency: str) -> dict:
+    """Valorisation du portefeuille à partir des actifs et des cotations déjà chargés"""
     total_value_usd = 0
     assets_detail = []
     
@@ -290,17 +956,8 @@ def get_portfolio_valuation(
     }
 
 
-@app.get("/portfolio/diversification")
-def get_portfolio_diversification(db: Session = Depends(get_db)):
-    """Analyser la diversification du portefeuille"""
-    assets = crud.get_assets(db)
-    
-    if not assets:
-        return {"message": "Portefeuille vide"}
-    
-    symbols = list(set(asset.symbol for asset in assets))
-    prices = get_crypto_prices(symbols)
-    
+def compute_diversification(assets: list, prices: dict) -> dict:
+    """Répartition du portefeuille à partir des actifs et des cotations déjà chargés"""
     total_value = 0
     asset_values = {}
     
@@ -329,6 +986,38 @@ def get_portfolio_diversification(db: Session = Depends(get_db)):
     }
 
 
+@app.get("/portfolio/valuation")
+def get_portfolio_valuation(
+    currency: str = "USD",
+    db: Session = Depends(get_db)
+):
+    """Obtenir la valorisation totale du portefeuille"""
+    assets = crud.get_assets(db)
+    
+    if not assets:
+        return {"total_value": 0, "currency": currency, "assets": []}
+    
+    # Récupérer tous les symboles uniques
+    symbols = list(set(asset.symbol for asset in assets))
+    prices = get_crypto_prices(symbols)
+    
+    return compute_valuation(assets, prices, currency)
+
+
+@app.get("/portfolio/diversification")
+def get_portfolio_diversification(db: Session = Depends(get_db)):
+    """Analyser la diversification du portefeuille"""
+    assets = crud.get_assets(db)
+    
+    if not assets:
+        return {"message": "Portefeuille vide"}
+    
+    symbols = list(set(asset.symbol for asset in assets))
+    prices = get_crypto_prices(symbols)
+    
+    return compute_diversification(assets, prices)
+
+
 # ==================== ROUTES ALERTES ====================
 
 @app.post("/alerts", response_model=models.AlertResponse)
@@ -337,16 +1026,60 @@ def create_alert(
     db: Session = Depends(get_db)
 ):
     """Créer une alerte de prix"""
-    return crud.create_alert(db, alert)
+    db_alert = crud.create_alert(db, alert)
+    alert_index.add([db_alert])
+    return db_alert
+
+
+@app.post("/alerts/bulk")
+def create_alerts_bulk(
+    alerts: List[models.AlertCreate],
+    db: Session = Depends(get_db)
+):
+    """Créer plusieurs alertes en une seule transaction"""
+    inserted = crud.bulk_create_alerts(db, alerts)
+    reload_alert_index(db)
+    return {"message": "Import terminé", "inserted": inserted}
+
+
+@app.post("/alerts/import")
+def import_alerts(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Importer des alertes depuis un fichier CSV (colonnes: symbol,target_price,condition)
+    ou NDJSON. Le fichier est lu en flux; une ligne invalide annule tout l'import.
+    """
+    inserted = _run_import(file, format, models.AlertCreate, crud.bulk_create_alerts, db)
+    reload_alert_index(db)
+    return {"message": "Import terminé", "inserted": inserted}
 
 
 @app.get("/alerts", response_model=List[models.AlertResponse])
 def list_alerts(
     status: Optional[str] = None,
+    symbol: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    source: Literal["live", "history", "all"] = "live",
+    format: Literal["json", "ndjson"] = "json",
     db: Session = Depends(get_db)
 ):
-    """Lister toutes les alertes"""
-    return crud.get_alerts(db, status)
+    """
+    Lister les alertes, des plus récentes aux plus anciennes (pagination par curseur).
+    source: "live" (alertes en cours), "history" (archivées) ou "all".
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    format=ndjson diffuse toutes les alertes (une ligne JSON par alerte).
+    """
+    symbol = symbol.upper() if symbol else None
+    return _list_response(
+        lambda session, page_size, cursor: crud.get_alerts_page(
+            session, page_size, after=cursor, status=status, symbol=symbol, source=source
+        ),
+        limit, after, format, db
+    )
 
 
 @app.delete("/alerts/{alert_id}")
@@ -354,6 +1087,7 @@ def delete_alert(alert_id: int, db: Session = Depends(get_db)):
     """Supprimer une alerte"""
     if not crud.delete_alert(db, alert_id):
         raise HTTPException(status_code=404, detail="Alerte non trouvée")
+    alert_index.remove([alert_id])
     return {"message": "Alerte supprimée avec succès"}
 
 
@@ -365,12 +1099,12 @@ def check_alerts(
     """
     Vérifier manuellement toutes les alertes actives.
     
-    Note: Les alertes sont aussi vérifiées automatiquement toutes les 60 secondes
-    par le scheduler en arrière-plan.
+    Note: Les alertes sont aussi évaluées automatiquement à chaque changement
+    de prix, les cotations étant rafraîchies au moins toutes les 60 secondes.
     """
-    alerts = crud.get_alerts(db, status="active")
+    checked = len(alert_index)
     
-    if not alerts:
+    if not checked:
         return {
             "message": "Aucune alerte active",
             "checked": 0,
@@ -378,53 +1112,63 @@ def check_alerts(
             "scheduler_status": "running" if scheduler.running else "stopped"
         }
     
-    symbols = list(set(alert.symbol for alert in alerts))
-    prices = get_crypto_prices(symbols)
+    triggered = evaluate_alerts(db)
+    triggered_at = datetime.now().isoformat()
     
-    triggered = []
+    for alert in triggered:
+        alert["triggered_at"] = triggered_at
     
-    for alert in alerts:
-        if alert.symbol in prices:
-            current_price = prices[alert.symbol]["price"]
-            
-            # Logique de déclenchement
-            should_trigger = False
-            if alert.condition == "above" and current_price >= alert.target_price:
-                should_trigger = True
-            elif alert.condition == "below" and current_price <= alert.target_price:
-                should_trigger = True
-            
-            if should_trigger:
-                crud.update_alert_status(db, alert.id, "triggered")
-                triggered.append({
-                    "alert_id": alert.id,
-                    "symbol": alert.symbol,
-                    "target_price": alert.target_price,
-                    "current_price": current_price,
-                    "condition": alert.condition,
-                    "triggered_at": datetime.now().isoformat()
-                })
-                
-                # Background task pour notification
-                background_tasks.add_task(
-                    send_alert_notification,
-                    alert.symbol,
-                    current_price,
-                    alert.target_price
-                )
+    # Notifications envoyées par le worker depuis le journal des déclenchements
+    if triggered:
+        schedule_notification_delivery(background_tasks)
     
     return {
-        "checked": len(alerts),
+        "checked": checked,
         "triggered": triggered,
         "scheduler_status": "running" if scheduler.running else "stopped",
         "scheduler_interval": f"{ALERT_CHECK_INTERVAL}s"
     }
 
 
-def send_alert_notification(symbol: str, current_price: float, target_price: float):
+@app.post("/alerts/backtest")
+def backtest_alerts(request: models.BacktestRequest):
+    """
+    Rejouer des définitions d'alertes sur l'historique local des cotations
+    pour savoir quand et combien de fois elles se seraient déclenchées.
+    """
+    if ticks is None:
+        raise HTTPException(status_code=503, detail="Historique des cotations désactivé")
+
+    def to_ms(value: datetime) -> int:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+
+    start_ms, end_ms = to_ms(request.start), to_ms(request.end)
+    series = {}
+    for symbol in set(alert.symbol for alert in request.alerts):
+        data = ticks.read_concat(symbol, start_ms, end_ms)
+        series[symbol] = (np.ascontiguousarray(data["ts"]), np.ascontiguousarray(data["price"]))
+
+    return {
+        "start": request.start.isoformat(),
+        "end": request.end.isoformat(),
+        "results": backtest.run_backtest(request.alerts, series, request.max_events)
+    }
+
+
+def send_alert_notification(
+    symbol: str,
+    current_price: float,
+    target_price: float,
+    idempotency_key: Optional[str] = None
+):
     """
     Envoyer une notification d'alerte.
-    Cette fonction est exécutée en arrière-plan et ne bloque pas la requête.
+    Appelée par le worker de notifications, hors de l'évaluation des alertes.
+    Une même alerte peut être notifiée plus d'une fois (après un crash):
+    idempotency_key permet au destinataire d'ignorer les doublons.
+    Lever une exception signale un échec (nouvelle tentative plus tard).
     
     Peut être étendue pour envoyer:
     - Email
@@ -438,6 +1182,8 @@ def send_alert_notification(symbol: str, current_price: float, target_price: flo
         f"   Seuil: ${target_price:.2f}\n"
         f"   Timestamp: {datetime.now().isoformat()}"
     )
+    if idempotency_key:
+        message += f"\n   Clé: {idempotency_key}"
     
     # Actuellement: Logging en console
     logger.warning(message)
@@ -446,13 +1192,14 @@ def send_alert_notification(symbol: str, current_price: float, target_price: flo
     # TODO: Extensions possibles
     # - send_email(to=user_email, subject="Alerte Crypto-Tracker", body=message)
     # - send_sms(phone=user_phone, message=message)
-    # - requests.post(webhook_url, json={"symbol": symbol, "price": current_price})
+    # - requests.post(webhook_url, json={"symbol": symbol, "price": current_price},
+    #                 headers={"Idempotency-Key": idempotency_key})
     # - discord_webhook(embed=create_embed(symbol, current_price))
     # - telegram_bot.send_message(chat_id=user_id, text=message)
 
 
 @app.get("/alerts/status")
-def get_alerts_scheduler_status():
+def get_alerts_scheduler_status(db: Session = Depends(get_db)):
     """
     Obtenir le statut du scheduler d'alertes.
     Retourne des informations sur les jobs en arrière-plan.
@@ -470,20 +1217,89 @@ def get_alerts_scheduler_status():
     return {
         "scheduler_running": scheduler.running,
         "interval_seconds": ALERT_CHECK_INTERVAL,
+        "refresh_tiers": [
+            {"max_distance_pct": max_distance * 100, "interval_seconds": interval}
+            for max_distance, interval in ALERT_REFRESH_TIERS
+        ],
+        "notifications": crud.get_alert_trigger_stats(db, NOTIFICATION_MAX_ATTEMPTS),
         "active_jobs": len(jobs),
         "jobs": jobs
     }
 
 
+@app.get("/admission/status")
+def get_admission_status():
+    """
+    Obtenir l'état du contrôle d'admission: requêtes en cours, profondeur
+    de file, rejets et réponses périmées servies par classe de routes.
+    """
+    return admission_control.status()
+
+
+# ==================== ROUTES SANTÉ ====================
+
+@app.get("/health/live")
+def health_live():
+    """Sonde de vie: le processus répond"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready(response: Response):
+    """
+    Sonde de disponibilité: 200 seulement après le préchauffage
+    (cotations, index, scheduler), 503 pendant le démarrage, tant que
+    l'index des alertes n'a pas pu être chargé, et pendant l'arrêt.
+    """
+    if not warmup_state["ready"]:
+        response.status_code = 503
+    return {"status": "ready" if warmup_state["ready"] else "warming_up", "warmup": warmup_state}
+
+
+# ==================== ROUTES ADMINISTRATION ====================
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)):
+    """Dépendance: jeton PROFILE_TOKEN exigé dans l'en-tête X-Profile-Token"""
+    if profiler.token is None:
+        raise HTTPException(status_code=404, detail="Administration du profilage désactivée (PROFILE_TOKEN absent)")
+    if not profiler.token_accepted(x_profile_token):
+        raise HTTPException(status_code=403, detail="Jeton de profilage invalide")
+
+
+@app.get("/admin/profiling", dependencies=[Depends(require_profiling_token)])
+def get_profiling_status():
+    """Obtenir l'état du profilage et les agrégats par route / tâche"""
+    return profiler.status()
+
+
+@app.put("/admin/profiling", dependencies=[Depends(require_profiling_token)])
+def update_profiling(settings: models.ProfilingSettings):
+    """
+    Activer, désactiver ou régler le profilage sans redéploiement.
+    Les piles sont écrites au format collapsed dans PROFILE_DIR.
+    """
+    profiler.configure(
+        enabled=settings.enabled,
+        sample_rate=settings.sample_rate,
+        interval=settings.interval_ms / 1000 if settings.interval_ms is not None else None
+    )
+    return profiler.status()
+
+
+@app.delete("/admin/profiling", dependencies=[Depends(require_profiling_token)])
+def reset_profiling():
+    """Vider les agrégats en mémoire (les fichiers déjà écrits sont conservés)"""
+    profiler.reset()
+    return {"message": "Agrégats de profilage réinitialisés"}
+
+
 # ==================== ROUTES HISTORIQUE ====================
 
 @app.post("/portfolio/history/save")
 def save_portfolio_snapshot(db: Session = Depends(get_db)):
     """Enregistrer un snapshot de la valeur du portefeuille"""
-    valuation = get_portfolio_valuation(db=db)
-    total_value = valuation.get("total_value", 0)
-    
-    snapshot = crud.create_portfolio_history(db, total_value)
+    total_value = snapshot_service.take(db)
+    snapshot_service.flush(db)
     return {"message": "Snapshot enregistré", "value": total_value}
 
 
@@ -493,17 +1309,22 @@ def get_portfolio_history(
     db: Session = Depends(get_db)
 ):
     """Obtenir l'historique de performance du portefeuille"""
-    history = crud.get_portfolio_history(db, days)
+    history = crud.get_portfolio_series(db, days)
     
     if not history:
         return {"message": "Aucun historique disponible", "data": []}
     
+    return summarize_history(history, days)
+
+
+def summarize_history(history: list, days: int) -> dict:
+    """Série (timestamp, valeur) vers la réponse de /portfolio/history"""
     data = [
         {
-            "timestamp": h.timestamp.isoformat(),
-            "value_usd": h.total_value_usd
+            "timestamp": timestamp.isoformat(),
+            "value_usd": value_usd
         }
-        for h in history
+        for timestamp, value_usd in history
     ]
     
     # Calculer la variation
@@ -522,11 +1343,73 @@ def get_portfolio_history(
     }
 
 
+def _asset_price_series(db: Session, timestamps: np.ndarray) -> Optional[dict]:
+    """
+    Prix de chaque actif détenu, interpolés sur les dates des snapshots à partir
+    de l'historique local des cotations, et poids actuels dans le portefeuille.
+    """
+    if ticks is None:
+        return None
+
+    start_ms, end_ms = int(timestamps[0] * 1000), int(timestamps[-1] * 1000)
+    symbols, amounts, columns = [], [], []
+    for symbol, amount in crud.get_holdings(db):
+        series = ticks.read_concat(symbol, start_ms, end_ms)
+        if len(series) < 2:
+            continue
+        symbols.append(symbol)
+        amounts.append(amount)
+        columns.append(np.interp(timestamps * 1000, series["ts"], series["price"]))
+
+    if not symbols:
+        return None
+    prices = np.column_stack(columns)
+    values = np.array(amounts) * prices[-1]
+    return {"symbols": symbols, "weights": values / values.sum(), "prices": prices}
+
+
+@app.get("/portfolio/analytics")
+def get_portfolio_analytics(
+    days: int = Query(30, ge=1),
+    window: int = Query(20, ge=2, description="Fenêtre de volatilité (nombre de snapshots)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Indicateurs de performance du portefeuille: volatilité glissante,
+    drawdown maximal, ratio de Sharpe, et si l'historique local des
+    cotations le permet, contribution et corrélation par actif.
+    Mémorisés jusqu'au prochain snapshot.
+    """
+    last_snapshot_id = crud.get_latest_snapshot_id(db)
+    if last_snapshot_id is None:
+        return {"message": "Aucun historique disponible", "data_points": 0}
+
+    def compute() -> dict:
+        series = crud.get_portfolio_series(db, days)
+        if len(series) < 2:
+            return {"message": "Historique insuffisant", "data_points": len(series)}
+        timestamps, values = zip(*series)
+        timestamps = analytics.to_epoch(timestamps)
+        return analytics.portfolio_analytics(
+            timestamps,
+            np.array(values, dtype=float),
+            window,
+            risk_free_rate=RISK_FREE_RATE,
+            assets=_asset_price_series(db, timestamps)
+        )
+
+    result = analytics.memoized((days, window, last_snapshot_id), compute)
+    return {"period_days": days, "last_snapshot_id": last_snapshot_id, **result}
+
+
 # ==================== ROUTES BONUS ====================
 
-@app.get("/market/top")
-def get_top_cryptos(limit: int = 10):
-    """Obtenir le top des cryptomonnaies"""
+def fetch_top_cryptos(limit: int) -> list:
+    """Top des cryptomonnaies, mis en cache CACHE_DURATION secondes par limite"""
+    cached = market_cache.get(limit)
+    if cached and time.time() - cached[1] < CACHE_DURATION:
+        return cached[0]
+    
     url = f"{COINMARKETCAP_BASE_URL}/cryptocurrency/listings/latest"
     headers = {
         "X-CMC_PRO_API_KEY": COINMARKETCAP_API_KEY,
@@ -557,16 +1440,75 @@ def get_top_cryptos(limit: int = 10):
                 "market_cap": crypto["quote"]["USD"]["market_cap"]
             })
         
-        return {"top_cryptos": top_cryptos}
+        market_cache[limit] = (top_cryptos, time.time())
+        return top_cryptos
     
-    except requests.Timeout:
-        raise HTTPException(status_code=504, detail="Timeout lors de l'appel à CoinMarketCap")
-    except requests.RequestException as e:
-        print(f"Erreur requête: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erreur lors de la requête: {str(e)}")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Erreur inattendue: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+        raise _to_http_error(e)
+
+
+@app.get("/market/top")
+def get_top_cryptos(limit: int = 10):
+    """Obtenir le top des cryptomonnaies"""
+    return {"top_cryptos": fetch_top_cryptos(limit)}
+
+
+# ==================== ROUTE DASHBOARD ====================
+
+@app.get("/dashboard")
+def get_dashboard(
+    currency: str = "USD",
+    history_days: int = Query(7, ge=1),
+    top_limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Vue agrégée du tableau de bord: valorisation, diversification, résumé des
+    alertes actives, historique récent et top du marché, calculés à partir
+    d'une seule lecture des actifs et d'une seule récupération des cotations.
+    Une section dont la source amont échoue vaut null et son erreur est listée.
+    """
+    errors = {}
+    assets = crud.get_assets(db)
+    
+    valuation = {"total_value": 0, "currency": currency, "assets": []}
+    diversification = {"total_value_usd": 0, "diversification": []}
+    if assets:
+        try:
+            prices = get_crypto_prices(list(set(asset.symbol for asset in assets)))
+            valuation = compute_valuation(assets, prices, currency)
+            diversification = compute_diversification(assets, prices)
+        except HTTPException as e:
+            valuation = diversification = None
+            errors["quotes"] = e.detail
+    
+    history = crud.get_portfolio_series(db, history_days)
+    
+    try:
+        top_market = fetch_top_cryptos(top_limit)
+    except HTTPException as e:
+        top_market = None
+        errors["market"] = e.detail
+    
+    closest = sorted(alert_index.proximity(time.time()).items(), key=lambda item: item[1])[:5]
+    
+    return {
+        "valuation": valuation,
+        "diversification": diversification,
+        "alerts": {
+            "active": len(alert_index),
+            "by_symbol": alert_index.counts_by_symbol(),
+            "closest": [
+                {"symbol": symbol, "distance_pct": round(distance * 100, 2)}
+                for symbol, distance in closest
+            ]
+        },
+        "history": summarize_history(history, history_days) if history else None,
+        "top_market": top_market,
+        "errors": errors
+    }
 
 
 @app.get("/")
@@ -578,6 +1520,8 @@ def root():
             "portfolio": "/portfolio/assets, /portfolio/valuation, /portfolio/diversification",
             "alerts": "/alerts, /alerts/check",
             "history": "/portfolio/history",
-            "market": "/market/top"
+            "market": "/market/top",
+            "dashboard": "/dashboard",
+            "health": "/health/live, /health/ready"
         }
     }
\ No newline at end of file
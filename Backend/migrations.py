@@ -0,0 +1,120 @@
+# migrations.py
+"""
+Mise à niveau d'une base existante vers le schéma courant.
+
+create_all ne crée que les tables absentes: une base créée avant les
+alertes avancées garde une table price_alerts sans les colonnes percent,
+window_seconds et reference_price, avec target_price obligatoire et sans
+AUTOINCREMENT, et les nouveaux index des tables existantes manquent.
+
+Sous SQLite, price_alerts est reconstruite en une transaction (la
+colonne obligatoire et AUTOINCREMENT ne peuvent pas être modifiés par
+ALTER TABLE); la séquence repart après le plus grand id connu, archives
+comprises. Sur les autres bases, les colonnes manquantes sont ajoutées
+et target_price devient facultatif. upgrade_schema est idempotente.
+"""
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import database_models
+
+logger = logging.getLogger(__name__)
+
+PRICE_ALERTS = database_models.PriceAlert.__table__
+
+
+def _price_alerts_outdated(engine: Engine) -> bool:
+    """price_alerts existe et diffère du modèle (colonnes, target_price, AUTOINCREMENT)"""
+    inspector = inspect(engine)
+    if not inspector.has_table(PRICE_ALERTS.name):
+        return False
+    columns = {column["name"]: column for column in inspector.get_columns(PRICE_ALERTS.name)}
+    if set(PRICE_ALERTS.columns.keys()) - set(columns):
+        return True
+    if not columns["target_price"]["nullable"]:
+        return True
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            sql = conn.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (PRICE_ALERTS.name,)
+            ).scalar()
+        return "AUTOINCREMENT" not in (sql or "").upper()
+    return False
+
+
+def _rebuild_sqlite_price_alerts(engine: Engine):
+    """Recréer price_alerts selon le modèle et y recopier les alertes existantes"""
+    inspector = inspect(engine)
+    old_columns = [column["name"] for column in inspector.get_columns(PRICE_ALERTS.name)]
+    copied = ", ".join(name for name in PRICE_ALERTS.columns.keys() if name in old_columns)
+    max_id = "SELECT max(id) FROM price_alerts"
+    if inspector.has_table(database_models.AlertHistory.__tablename__):
+        max_id = "SELECT max(id) FROM (SELECT id FROM price_alerts UNION ALL SELECT id FROM alert_history)"
+    old_indexes = [index["name"] for index in inspector.get_indexes(PRICE_ALERTS.name)]
+
+    statements = ["ALTER TABLE price_alerts RENAME TO price_alerts_old"]
+    statements += [f'DROP INDEX "{name}"' for name in old_indexes]
+    statements.append(str(CreateTable(PRICE_ALERTS).compile(dialect=engine.dialect)))
+    statements += [str(CreateIndex(index).compile(dialect=engine.dialect)) for index in PRICE_ALERTS.indexes]
+    statements += [
+        f"INSERT INTO price_alerts ({copied}) SELECT {copied} FROM price_alerts_old",
+        "DELETE FROM sqlite_sequence WHERE name = 'price_alerts'",
+        f"INSERT INTO sqlite_sequence (name, seq) SELECT 'price_alerts', coalesce(({max_id}), 0)",
+        "DROP TABLE price_alerts_old",
+    ]
+
+    # Transaction explicite: le pilote sqlite3 validerait sinon chaque DDL séparément
+    raw = engine.raw_connection()
+    try:
+        dbapi = raw.driver_connection
+        isolation_level = dbapi.isolation_level
+        dbapi.isolation_level = None
+        cursor = dbapi.cursor()
+        try:
+            cursor.execute("BEGIN")
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            dbapi.isolation_level = isolation_level
+    finally:
+        raw.close()
+
+
+def _alter_price_alerts(engine: Engine):
+    """Ajouter les colonnes manquantes et rendre target_price facultatif (hors SQLite)"""
+    columns = {column["name"]: column for column in inspect(engine).get_columns(PRICE_ALERTS.name)}
+    with engine.begin() as conn:
+        for column in PRICE_ALERTS.columns:
+            if column.name not in columns:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE price_alerts ADD COLUMN {column.name} {column_type}")
+        if not columns["target_price"]["nullable"]:
+            conn.exec_driver_sql("ALTER TABLE price_alerts ALTER COLUMN target_price DROP NOT NULL")
+
+
+def upgrade_schema(engine: Engine):
+    """Mettre à niveau les tables existantes (avant create_all, qui crée les tables absentes)"""
+    if _price_alerts_outdated(engine):
+        logger.info("🛠️ Mise à niveau de la table price_alerts")
+        if engine.dialect.name == "sqlite":
+            _rebuild_sqlite_price_alerts(engine)
+        else:
+            _alter_price_alerts(engine)
+
+    # Index ajoutés aux tables existantes (create_all ne les crée qu'avec la table)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in database_models.Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
@@ -1,7 +1,17 @@
 # models.py
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
-from typing import Optional, Literal
+from typing import List, Optional, Literal
+import symbol_map
+from alert_engine import HISTORY_RESOLUTION, MAX_WINDOW_SECONDS
+
+
+def check_symbol(v: str) -> str:
+    """Normaliser un symbole et le valider contre la correspondance CoinMarketCap en mémoire"""
+    v = v.upper().strip()
+    if not symbol_map.registry.is_known(v):
+        raise ValueError(f"Symbole inconnu: {v}")
+    return v
 
 
 # ==================== ASSET SCHEMAS ====================
@@ -14,8 +24,8 @@ class AssetCreate(BaseModel):
     @field_validator('symbol')
     @classmethod
     def symbol_uppercase(cls, v: str) -> str:
-        """Convertir le symbole en majuscules"""
-        return v.upper().strip()
+        """Convertir le symbole en majuscules et vérifier qu'il est connu"""
+        return check_symbol(v)
     
     class Config:
         json_schema_extra = {
@@ -46,15 +56,44 @@ class AssetUpdate(BaseModel):
 # ==================== ALERT SCHEMAS ====================
 
 class AlertCreate(BaseModel):
-    """Schéma pour créer une alerte"""
+    """
+    Schéma pour créer une alerte.
+    - above / below: prix au-dessus / en dessous de target_price
+    - cross_up / cross_down: franchissement de target_price (front montant/descendant)
+    - pct_change: variation d'au moins `percent` % par rapport au prix en
+      vigueur `window_seconds` plus tôt (percent > 0: hausse, percent < 0: baisse)
+    - trailing: stop suiveur de `percent` % sous le plus haut
+      (percent < 0: au-dessus du plus bas)
+    """
     symbol: str = Field(..., min_length=2, max_length=10)
-    target_price: float = Field(..., gt=0, description="Prix cible (doit être > 0)")
-    condition: Literal["above", "below"] = Field(..., description="Condition: 'above' ou 'below'")
+    target_price: Optional[float] = Field(None, gt=0, description="Prix cible (doit être > 0)")
+    condition: Literal["above", "below", "cross_up", "cross_down", "pct_change", "trailing"] = Field(
+        ..., description="Condition: 'above', 'below', 'cross_up', 'cross_down', 'pct_change' ou 'trailing'"
+    )
+    percent: Optional[float] = Field(None, description="Seuil en % (pct_change, trailing)")
+    window_seconds: Optional[int] = Field(
+        None, ge=HISTORY_RESOLUTION, le=MAX_WINDOW_SECONDS,
+        description="Fenêtre de variation (pct_change, de 60s à 24h)"
+    )
     
     @field_validator('symbol')
     @classmethod
     def symbol_uppercase(cls, v: str) -> str:
-        return v.upper().strip()
+        return check_symbol(v)
+    
+    @model_validator(mode="after")
+    def check_condition_params(self) -> "AlertCreate":
+        """Vérifier les paramètres requis par chaque type d'alerte"""
+        if self.condition in ("above", "below", "cross_up", "cross_down"):
+            if self.target_price is None:
+                raise ValueError(f"target_price est requis pour la condition '{self.condition}'")
+        elif not self.percent:
+            raise ValueError(f"percent (non nul) est requis pour la condition '{self.condition}'")
+        elif self.condition == "pct_change" and self.window_seconds is None:
+            raise ValueError("window_seconds est requis pour la condition 'pct_change'")
+        elif self.condition == "trailing" and abs(self.percent) >= 100:
+            raise ValueError("percent doit être compris entre -100 et 100 pour 'trailing'")
+        return self
     
     class Config:
         json_schema_extra = {
@@ -70,8 +109,10 @@ class AlertResponse(BaseModel):
     """Schéma de réponse pour une alerte"""
     id: int
     symbol: str
-    target_price: float
+    target_price: Optional[float] = None
     condition: str
+    percent: Optional[float] = None
+    window_seconds: Optional[int] = None
     status: str
     created_at: datetime
     triggered_at: Optional[datetime] = None
@@ -80,6 +121,20 @@ class AlertResponse(BaseModel):
         from_attributes = True
 
 
+class BacktestRequest(BaseModel):
+    """Schéma pour rejouer des alertes sur l'historique des cotations"""
+    alerts: List[AlertCreate] = Field(..., min_length=1, max_length=1000)
+    start: datetime = Field(..., description="Début de la période (UTC si sans fuseau)")
+    end: datetime = Field(..., description="Fin de la période (UTC si sans fuseau)")
+    max_events: int = Field(100, ge=0, le=10000, description="Déclenchements détaillés par alerte")
+    
+    @model_validator(mode="after")
+    def check_period(self) -> "BacktestRequest":
+        if self.end <= self.start:
+            raise ValueError("end doit être postérieur à start")
+        return self
+
+
 # ==================== PORTFOLIO SCHEMAS ====================
 
 class PortfolioValuationResponse(BaseModel):
@@ -116,4 +171,13 @@ class CryptoPrice(BaseModel):
 
 class TopCryptosResponse(BaseModel):
     """Schéma pour le top des cryptos"""
-    top_cryptos: list
\ No newline at end of file
+    top_cryptos: list
+
+
+# ==================== ADMIN SCHEMAS ====================
+
+class ProfilingSettings(BaseModel):
+    """Schéma pour activer/régler le profilage à chaud"""
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(None, ge=0, le=1, description="Fraction des requêtes profilées")
+    interval_ms: Optional[float] = Field(None, ge=1, le=1000, description="Période d'échantillonnage des piles")
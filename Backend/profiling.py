@@ -0,0 +1,288 @@
+# profiling.py
+"""
+Profilage par échantillonnage des requêtes et des tâches planifiées.
+
+Activable à chaud (endpoint d'administration, protégé par un jeton) pour
+une fraction des requêtes, ou pour une requête donnée via l'en-tête
+X-Profile (désactivé par défaut; sa valeur doit égaler le jeton configuré
+s'il y en a un). Un thread
+échantillonneur relève périodiquement les piles (sys._current_frames)
+des threads qui exécutent une capture en cours, sans instrumenter le
+code: le coût est nul hors capture et borné par la période d'échantillonnage
+pendant une capture.
+
+Les piles sont agrégées par route (ou par tâche) et écrites au format
+« collapsed stacks » (une ligne « cadre;cadre;... nombre »), lisible par
+flamegraph.pl et speedscope: <PROFILE_DIR>/<route>.collapsed. Les
+fichiers sont réécrits par un thread dédié, au plus une fois par
+WRITE_DELAY secondes et par route, jamais sur la boucle d'événements.
+"""
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+COLLAPSED_SUFFIX = ".collapsed"
+WRITE_DELAY = 1.0  # Regroupement des écritures (secondes)
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}:{code.co_firstlineno}"
+
+
+def _collapse(frame) -> str:
+    """Pile d'un thread, de la racine au cadre courant"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _runs(frame, code) -> bool:
+    """Le code (fonction de la route) est-il dans la pile du thread ?"""
+    while frame is not None:
+        if frame.f_code is code:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class _Capture:
+    """Échantillons d'une requête ou d'une exécution de tâche en cours"""
+
+    def __init__(self, key: Optional[str], thread_id: Optional[int] = None, scope: Optional[dict] = None):
+        self.key = key
+        self.scope = scope
+        # Tâche: thread connu. Requête: thread retrouvé via le code de la route
+        self.fixed_thread = thread_id
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+
+    def endpoint_code(self):
+        endpoint = self.scope.get("endpoint") if self.scope else None
+        return getattr(endpoint, "__code__", None)
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles partagé et agrégats par route"""
+
+    def __init__(self, output_dir: str, sample_rate: float, interval: float, allow_header: bool,
+                 token: Optional[str] = None):
+        self.output_dir = output_dir
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.allow_header = allow_header
+        self.token = token
+        self._lock = threading.Lock()
+        self._active: List[_Capture] = []
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._profiles: Dict[str, Counter] = {}
+        self._captures: Counter = Counter()
+        # Routes dont le fichier est à réécrire, et thread d'écriture
+        self._dirty: set = set()
+        self._write_wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+    # ---------- Configuration ----------
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  interval: Optional[float] = None):
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if interval is not None:
+            self.interval = interval
+
+    def header_accepted(self, value: bytes) -> bool:
+        """L'en-tête X-Profile reçu force-t-il la capture ?"""
+        if not self.allow_header or value in (b"", b"0"):
+            return False
+        if self.token is None:
+            return True
+        return hmac.compare_digest(value, self.token.encode())
+
+    def token_accepted(self, value: Optional[str]) -> bool:
+        """Jeton d'administration valide ? (toujours faux sans jeton configuré)"""
+        if self.token is None or value is None:
+            return False
+        return hmac.compare_digest(value.encode(), self.token.encode())
+
+    def should_profile(self, forced: bool = False) -> bool:
+        if forced:
+            return True
+        return self.enabled and random.random() < self.sample_rate
+
+    def status(self) -> dict:
+        with self._lock:
+            profiles = {
+                key: {"captures": self._captures[key], "samples": sum(stacks.values())}
+                for key, stacks in self._profiles.items()
+            }
+            active = len(self._active)
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "header_allowed": self.allow_header,
+            "header_token_required": self.token is not None,
+            "output_dir": os.path.abspath(self.output_dir),
+            "active_captures": active,
+            "profiles": profiles,
+        }
+
+    def reset(self):
+        """Vider les agrégats en mémoire (les fichiers déjà écrits sont conservés)"""
+        with self._lock:
+            self._profiles.clear()
+            self._captures.clear()
+
+    # ---------- Captures ----------
+
+    def start(self, capture: _Capture) -> _Capture:
+        with self._lock:
+            self._active.append(capture)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return capture
+
+    def stop(self, capture: _Capture):
+        with self._lock:
+            self._active.remove(capture)
+            if capture.key is None or not capture.stacks:
+                return
+            self._profiles.setdefault(capture.key, Counter()).update(capture.stacks)
+            self._captures[capture.key] += 1
+            self._dirty.add(capture.key)
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="profiler-writer", daemon=True)
+                self._writer.start()
+        self._write_wakeup.set()
+
+    def profile_job(self, name: str) -> Callable:
+        """Décorateur: échantillonner une partie des exécutions d'une tâche planifiée"""
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.should_profile():
+                    return func(*args, **kwargs)
+                capture = self.start(_Capture(f"job {name}", thread_id=threading.get_ident()))
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.stop(capture)
+            return wrapper
+        return decorator
+
+    # ---------- Échantillonnage ----------
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            # Effacer avant de lire la liste: un start() concurrent n'est jamais manqué
+            self._wakeup.clear()
+            with self._lock:
+                active = list(self._active)
+            if not active:
+                self._wakeup.wait()
+                continue
+
+            frames = sys._current_frames()
+            claimed = {c.thread_id for c in active if c.thread_id is not None}
+            for capture in active:
+                if capture.fixed_thread is None:
+                    self._bind(capture, frames, claimed, own)
+                frame = frames.get(capture.thread_id) if capture.thread_id is not None else None
+                if frame is not None:
+                    capture.stacks[_collapse(frame)] += 1
+            del frames
+            self._wakeup.wait(self.interval)
+
+    @staticmethod
+    def _bind(capture: _Capture, frames: dict, claimed: set, own: int):
+        """Associer une requête au thread qui exécute sa route (tant qu'il l'exécute)"""
+        code = capture.endpoint_code()
+        if code is None:
+            return
+        if capture.thread_id is not None:
+            if _runs(frames.get(capture.thread_id), code):
+                return
+            claimed.discard(capture.thread_id)
+            capture.thread_id = None
+        for thread_id, frame in frames.items():
+            if thread_id != own and thread_id not in claimed and _runs(frame, code):
+                capture.thread_id = thread_id
+                claimed.add(thread_id)
+                return
+
+    # ---------- Sortie ----------
+
+    def _write_loop(self):
+        while True:
+            self._write_wakeup.wait()
+            # Laisser les captures rapprochées s'accumuler avant de réécrire
+            time.sleep(WRITE_DELAY)
+            self._write_wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Réécrire les fichiers des routes modifiées depuis la dernière écriture"""
+        with self._lock:
+            pending = {key: Counter(self._profiles[key]) for key in self._dirty if key in self._profiles}
+            self._dirty.clear()
+        for key, stacks in pending.items():
+            try:
+                self._write(key, stacks)
+            except OSError as e:
+                logger.warning(f"Profil non écrit pour {key}: {str(e)}")
+
+    def _write(self, key: str, stacks: Counter):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, re.sub(r"[^A-Za-z0-9]+", "_", key).strip("_") + COLLAPSED_SUFFIX)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp_path, path)
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: capture les requêtes échantillonnées ou marquées X-Profile"""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        forced = any(
+            name == PROFILE_HEADER and self.profiler.header_accepted(value) for name, value in scope["headers"]
+        )
+        if not self.profiler.should_profile(forced):
+            return await self.app(scope, receive, send)
+
+        # Le routeur complète ce même scope (endpoint, route) avant d'appeler la route
+        capture = self.profiler.start(_Capture(None, scope=scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            capture.key = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+            self.profiler.stop(capture)
@@ -0,0 +1,79 @@
+# quotes.py
+"""
+Table des cotations en mémoire, par symbole.
+
+Chaque symbole garde sa dernière cotation et son heure de réception, ce qui
+permet de ne rafraîchir que les symboles périmés. Les abonnés sont notifiés
+des symboles dont le prix a réellement changé à chaque mise à jour.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QuoteListener = Callable[[Dict[str, dict]], None]
+
+
+class QuoteTable:
+    """Dernière cotation connue par symbole ({symbole: (cotation, reçue_à)})"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Sérialise écriture + notification: les abonnés reçoivent les mises à jour dans l'ordre
+        self._notify_lock = threading.Lock()
+        self._quotes: Dict[str, Tuple[dict, float]] = {}
+        self._listeners: List[QuoteListener] = []
+
+    def subscribe(self, listener: QuoteListener):
+        """Être notifié des cotations dont le prix a changé"""
+        self._listeners.append(listener)
+
+    def get(self, symbol: str) -> Optional[Tuple[dict, float]]:
+        """Dernière cotation d'un symbole et son heure de réception"""
+        return self._quotes.get(symbol)
+
+    def fetched_at(self, symbol: str) -> Optional[float]:
+        entry = self._quotes.get(symbol)
+        return entry[1] if entry else None
+
+    def lookup(self, symbols: Iterable[str], max_age: float) -> Tuple[Dict[str, dict], List[str]]:
+        """Séparer les symboles en cotations fraîches et symboles à récupérer"""
+        now = time.time()
+        fresh, missing = {}, []
+        with self._lock:
+            for symbol in symbols:
+                entry = self._quotes.get(symbol)
+                if entry and now - entry[1] < max_age:
+                    fresh[symbol] = entry[0]
+                else:
+                    missing.append(symbol)
+        return fresh, missing
+
+    def update(self, quotes: Dict[str, dict], notify: bool = True) -> Dict[str, dict]:
+        """
+        Enregistrer de nouvelles cotations et notifier les abonnés (sauf si
+        notify est faux). Retourne les cotations dont le prix a changé.
+        """
+        with self._notify_lock:
+            now = time.time()
+            changed = {}
+            with self._lock:
+                for symbol, quote in quotes.items():
+                    previous = self._quotes.get(symbol)
+                    if previous is None or previous[0]["price"] != quote["price"]:
+                        changed[symbol] = quote
+                    self._quotes[symbol] = (quote, now)
+
+            if changed and notify:
+                for listener in self._listeners:
+                    try:
+                        listener(changed)
+                    except Exception as e:
+                        logger.error(f"Erreur dans un abonné de la table des cotations: {str(e)}")
+        return changed
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
@@ -0,0 +1,49 @@
+# serializers.py
+"""
+Sérialisation rapide des listes renvoyées par l'API.
+
+Les routes de liste lisent des tuples SQLAlchemy Core (sans objets ORM ni
+modèles pydantic) et les encodent directement en octets: avec orjson
+s'il est installé (dépendance optionnelle), sinon avec json.
+"""
+import json
+from datetime import date, datetime
+from typing import Iterable
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """Encoder en JSON compact (datetimes naïfs en ISO 8601, comme pydantic)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def rows_to_dicts(rows: Iterable) -> list:
+    """Lignes Core (Row) vers dictionnaires {colonne: valeur}"""
+    return [row._asdict() for row in rows]
+
+
+def ndjson_lines(rows: Iterable) -> bytes:
+    """Une ligne JSON par ligne de résultat"""
+    return b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+
+
+class FastJSONResponse(Response):
+    """Réponse JSON encodée par dumps() (orjson si disponible)"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
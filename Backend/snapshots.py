@@ -0,0 +1,104 @@
+# snapshots.py
+"""
+Snapshots de la valeur du portefeuille sans passer par la valorisation complète.
+
+Le total est calculé directement à partir des quantités agrégées en SQL
+(crud.get_holdings) et des cotations en mémoire. Les snapshots sont mis
+en tampon puis insérés par paquets, ce qui rend négligeable le coût d'un
+snapshot fréquent. Les snapshots périodiques ne sont enregistrés que si
+une cotation détenue a été reçue depuis le précédent: un total recalculé
+sur les mêmes cotations n'apporte aucun point nouveau.
+"""
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import crud
+
+logger = logging.getLogger(__name__)
+
+
+def portfolio_total(holdings: List[Tuple[str, float]], prices: Dict[str, dict]) -> float:
+    """Valeur totale en USD (les symboles sans cotation sont ignorés, comme pour /portfolio/valuation)"""
+    return round(sum(
+        amount * prices[symbol]["price"]
+        for symbol, amount in holdings
+        if symbol in prices
+    ), 2)
+
+
+class SnapshotService:
+    """Calcul des snapshots et tampon d'insertion par paquets"""
+
+    def __init__(
+        self,
+        price_source: Callable[[List[str]], Dict[str, dict]],
+        fetched_at: Callable[[str], Optional[float]],
+        flush_size: int,
+        flush_interval: float,
+        max_pending: int = 10000
+    ):
+        self.price_source = price_source
+        self.fetched_at = fetched_at
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Les plus anciens snapshots sont abandonnés si la base reste indisponible
+        self._pending: deque = deque(maxlen=max_pending)
+        self._last_flush = datetime.utcnow()
+        # Réception la plus récente des cotations utilisées au dernier snapshot
+        self._last_quotes_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def take(self, db: Session, periodic: bool = False) -> Optional[float]:
+        """
+        Calculer la valeur courante et la mettre en tampon.
+        periodic: retourne None sans snapshot si le portefeuille est vide ou si
+        aucune cotation détenue n'a été reçue depuis le snapshot précédent.
+        """
+        holdings = crud.get_holdings(db)
+        if not holdings and periodic:
+            return None
+
+        symbols = [symbol for symbol, _ in holdings]
+        prices = self.price_source(symbols) if holdings else {}
+        quotes_at = max((self.fetched_at(symbol) or 0.0 for symbol in symbols), default=0.0)
+        with self._lock:
+            if periodic and quotes_at <= self._last_quotes_at:
+                return None
+            self._last_quotes_at = max(self._last_quotes_at, quotes_at)
+
+        total = portfolio_total(holdings, prices)
+        with self._lock:
+            self._pending.append((datetime.utcnow(), total))
+        return total
+
+    def flush_due(self) -> bool:
+        """Tampon plein ou plus ancien que flush_interval"""
+        with self._lock:
+            if not self._pending:
+                return False
+            age = (datetime.utcnow() - self._last_flush).total_seconds()
+            return len(self._pending) >= self.flush_size or age >= self.flush_interval
+
+    def flush(self, db: Session) -> int:
+        """Insérer les snapshots en attente (remis en tampon en cas d'échec)"""
+        with self._lock:
+            rows = list(self._pending)
+            self._pending.clear()
+            self._last_flush = datetime.utcnow()
+        if not rows:
+            return 0
+
+        try:
+            return crud.bulk_create_portfolio_history(db, rows)
+        except Exception:
+            with self._lock:
+                self._pending.extendleft(reversed(rows))
+            raise
@@ -0,0 +1,97 @@
+# symbol_map.py
+"""
+Correspondance symbole -> identifiant CoinMarketCap, tenue en mémoire.
+
+Chargée depuis le cache local (dernier résultat de /cryptocurrency/map),
+ou depuis une fixture embarquée hors ligne, puis rafraîchie chaque jour.
+Sert à valider les symboles à la création sans appel à l'API et à
+demander les cotations par identifiant (sans ambiguïté de ticker).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SYMBOL_MAP_PATH = os.getenv("SYMBOL_MAP_PATH", "./cmc_symbol_map.json")
+SYMBOL_MAP_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cmc_map_fixture.json")
+SYMBOL_MAP_MAX_AGE = 24 * 3600  # Rafraîchir une fois par jour
+
+
+class SymbolMap:
+    """Symbole -> id CoinMarketCap (le mieux classé pour les tickers partagés)"""
+
+    def __init__(self, cache_path: str, fixture_path: str):
+        self.cache_path = cache_path
+        self.fixture_path = fixture_path
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._symbols: Dict[int, str] = {}
+        self.loaded_at: Optional[float] = None
+        self.source: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _index(entries: Iterable[dict]) -> Dict[str, int]:
+        """Garder, pour chaque symbole, l'entrée active la mieux classée"""
+        best: Dict[str, tuple] = {}
+        for entry in entries:
+            if entry.get("is_active", 1) == 0:
+                continue
+            symbol = str(entry["symbol"]).upper()
+            rank = entry.get("rank") or float("inf")
+            if symbol not in best or rank < best[symbol][0]:
+                best[symbol] = (rank, int(entry["id"]))
+        return {symbol: cmc_id for symbol, (rank, cmc_id) in best.items()}
+
+    def _set(self, entries: List[dict], source: str, loaded_at: float):
+        ids = self._index(entries)
+        with self._lock:
+            self._ids = ids
+            self._symbols = {cmc_id: symbol for symbol, cmc_id in ids.items()}
+            self.loaded_at = loaded_at
+            self.source = source
+
+    def load(self):
+        """Charger le cache local, ou la fixture embarquée à défaut"""
+        for path, source in ((self.cache_path, "cache"), (self.fixture_path, "fixture")):
+            try:
+                with open(path) as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                continue
+            loaded_at = os.path.getmtime(path) if source == "cache" else 0.0
+            self._set(entries, source, loaded_at)
+            logger.info(f"Correspondance des symboles chargée ({len(self)} symboles, {source})")
+            return
+
+    def update(self, entries: List[dict]):
+        """Remplacer la correspondance par un résultat frais de l'API et le persister"""
+        self._set(entries, "api", time.time())
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.time() - self.loaded_at > SYMBOL_MAP_MAX_AGE
+
+    def resolve(self, symbol: str) -> Optional[int]:
+        return self._ids.get(symbol)
+
+    def symbol_for(self, cmc_id: int) -> Optional[str]:
+        return self._symbols.get(cmc_id)
+
+    def is_known(self, symbol: str) -> bool:
+        """Symbole connu (toujours vrai tant qu'aucune correspondance n'est chargée)"""
+        return not self._ids or symbol in self._ids
+
+
+# Instance partagée (validation des schémas et appels de cotations),
+# chargée au démarrage de l'application
+registry = SymbolMap(SYMBOL_MAP_PATH, SYMBOL_MAP_FIXTURE)
@@ -0,0 +1,6 @@
+# conftest.py
+"""Rendre les modules du backend (à plat dans Backend/) importables par les tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
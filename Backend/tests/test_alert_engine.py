@@ -0,0 +1,135 @@
+# test_alert_engine.py
+"""Tests de l'index vectoriel des alertes (alert_engine.AlertEngine)"""
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+import alert_engine
+import models
+
+
+def make_alert(alert_id, symbol, condition, target_price=None, percent=None, window_seconds=None):
+    return SimpleNamespace(
+        id=alert_id, symbol=symbol, condition=condition, target_price=target_price,
+        percent=percent, window_seconds=window_seconds, reference_price=None
+    )
+
+
+def test_static_thresholds_fire_once_and_leave_index():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([
+        make_alert(1, "BTC", "above", target_price=100),
+        make_alert(2, "BTC", "below", target_price=50),
+    ])
+
+    assert engine.evaluate({"BTC": 90}, now=0) == []
+    fired = engine.evaluate({"BTC": 110}, now=1)
+    assert [t["alert_id"] for t in fired] == [1]
+    assert len(engine) == 1
+    assert engine.evaluate({"BTC": 120}, now=2) == []
+
+
+def test_cross_up_needs_previous_price_below_target():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([make_alert(1, "ETH", "cross_up", target_price=100)])
+
+    # Premier prix déjà au-dessus: pas de franchissement
+    assert engine.evaluate({"ETH": 105}, now=0) == []
+    assert engine.evaluate({"ETH": 95}, now=1) == []
+    assert [t["alert_id"] for t in engine.evaluate({"ETH": 101}, now=2)] == [1]
+
+
+def test_pct_change_with_distinct_windows_per_symbol():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([
+        make_alert(1, "BTC", "pct_change", percent=10, window_seconds=120),
+        make_alert(2, "BTC", "pct_change", percent=10, window_seconds=600),
+        make_alert(3, "ETH", "pct_change", percent=-10, window_seconds=120),
+    ])
+
+    engine.evaluate({"BTC": 100, "ETH": 100}, now=0)
+    engine.evaluate({"BTC": 105, "ETH": 95}, now=480)
+    # BTC: +10% sur 10 min (référence 100) mais seulement +4,8% sur 2 min (référence 105)
+    fired = engine.evaluate({"BTC": 110, "ETH": 85}, now=600)
+    assert sorted(t["alert_id"] for t in fired) == [2, 3]
+
+
+def test_pct_change_needs_a_price_before_the_window():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([make_alert(1, "BTC", "pct_change", percent=10, window_seconds=600)])
+
+    engine.evaluate({"BTC": 100}, now=0)
+    # Fenêtre incomplète: prix au début de la fenêtre inconnu
+    assert engine.evaluate({"BTC": 120}, now=300) == []
+    assert engine.evaluate({"BTC": 100}, now=660) == []
+
+
+def test_pct_change_reference_is_price_in_force_at_window_start():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([make_alert(1, "BTC", "pct_change", percent=10, window_seconds=3600)])
+
+    # Prix stable (aucune mise à jour) pendant plus que la fenêtre, puis hausse
+    engine.evaluate({"BTC": 100}, now=0)
+    fired = engine.evaluate({"BTC": 111}, now=7200)
+    assert [t["threshold"] for t in fired] == [pytest.approx(110)]
+
+
+def test_full_day_window_is_covered_by_default_history():
+    engine = alert_engine.AlertEngine()
+    engine.load([make_alert(1, "BTC", "pct_change", percent=-10, window_seconds=86400)])
+
+    # Baisse lente de 100 à 89 en 10h, cotations toutes les 10s
+    fired = []
+    for step in range(3601):
+        fired += engine.evaluate({"BTC": 100 - 11 * step / 3600}, now=step * 10)
+    assert [t["alert_id"] for t in fired] == []
+    # Fenêtre de 24h complète: la référence est le prix de la première minute (~100)
+    fired = engine.evaluate({"BTC": 89}, now=86400 + alert_engine.HISTORY_RESOLUTION)
+    assert [t["alert_id"] for t in fired] == [1]
+
+
+def test_large_window_does_not_break_evaluation():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([
+        make_alert(1, "BTC", "pct_change", percent=5, window_seconds=10**12),
+        make_alert(2, "ETH", "above", target_price=10),
+    ])
+
+    engine.evaluate({"BTC": 100, "ETH": 5}, now=0)
+    assert set(engine.proximity(now=1)) == {"BTC", "ETH"}
+    fired = engine.evaluate({"BTC": 106, "ETH": 11}, now=10**12 + 60)
+    assert sorted(t["alert_id"] for t in fired) == [1, 2]
+
+
+def test_trailing_stop_tracks_high():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([make_alert(1, "SOL", "trailing", percent=10)])
+
+    engine.evaluate({"SOL": 100}, now=0)
+    tick = engine.prepare({"SOL": 120}, now=1)
+    assert tick.references == [(1, 120.0)]
+    engine.commit(tick)
+    assert engine.prepare({"SOL": 115}, now=2).references == []
+    assert engine.evaluate({"SOL": 109}, now=2) == []
+    assert [t["threshold"] for t in engine.evaluate({"SOL": 107}, now=3)] == [pytest.approx(108)]
+
+
+def test_uncommitted_tick_leaves_index_unchanged():
+    engine = alert_engine.AlertEngine(history_size=16)
+    engine.load([make_alert(1, "BTC", "cross_up", target_price=100)])
+
+    engine.evaluate({"BTC": 90}, now=0)
+    # Enregistrement en échec: le tick n'est pas appliqué
+    assert [t["alert_id"] for t in engine.prepare({"BTC": 105}, now=1).triggered] == [1]
+    assert len(engine) == 1
+    # Le prix précédent reste 90: le franchissement est toujours détecté
+    assert [t["alert_id"] for t in engine.evaluate({"BTC": 106}, now=2)] == [1]
+
+
+def test_window_seconds_is_bounded():
+    with pytest.raises(ValidationError):
+        models.AlertCreate(
+            symbol="BTC", condition="pct_change", percent=5,
+            window_seconds=alert_engine.MAX_WINDOW_SECONDS + 1
+        )
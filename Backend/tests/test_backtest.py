@@ -0,0 +1,86 @@
+# test_backtest.py
+"""Tests du rejeu des alertes sur l'historique (backtest.run_backtest)"""
+import numpy as np
+
+import backtest
+import models
+
+
+def make_series(prices, step_seconds=60):
+    ts = np.arange(len(prices), dtype=np.int64) * step_seconds * 1000
+    return {"BTC": (ts, np.array(prices, dtype=float))}
+
+
+def trigger_prices(result):
+    return [trigger["price"] for trigger in result["triggers"]]
+
+
+def test_above_and_below_count_each_rearm():
+    series = make_series([90, 110, 95, 120, 40, 60, 30])
+    above, below = backtest.run_backtest([
+        models.AlertCreate(symbol="BTC", condition="above", target_price=100),
+        models.AlertCreate(symbol="BTC", condition="below", target_price=50),
+    ], series)
+
+    assert above["trigger_count"] == 2
+    assert trigger_prices(above) == [110, 120]
+    assert trigger_prices(below) == [40, 30]
+    assert above["data_points"] == 7
+
+
+def test_cross_requires_previous_price_on_other_side():
+    # Au-dessus dès la première cotation: pas de franchissement
+    series = make_series([110, 90, 105, 108, 95])
+    cross_up, cross_down = backtest.run_backtest([
+        models.AlertCreate(symbol="BTC", condition="cross_up", target_price=100),
+        models.AlertCreate(symbol="BTC", condition="cross_down", target_price=100),
+    ], series)
+
+    assert trigger_prices(cross_up) == [105]
+    assert trigger_prices(cross_down) == [90, 95]
+
+
+def test_trailing_stop_follows_high_and_low():
+    series = make_series([100, 120, 105, 107, 130, 117])
+    down, up = backtest.run_backtest([
+        models.AlertCreate(symbol="BTC", condition="trailing", percent=10),
+        models.AlertCreate(symbol="BTC", condition="trailing", percent=-10),
+    ], series)
+
+    # 10% sous le plus haut: seuil 108 (plus haut 120) puis 117 (plus haut 130)
+    assert trigger_prices(down) == [105, 117]
+    # 10% au-dessus du plus bas (100): réarmée à 105, redéclenchée à 130
+    assert trigger_prices(up) == [120, 130]
+
+
+def test_pct_change_uses_price_in_force_at_window_start():
+    # Cotations irrégulières: 0s, 100s, 150s
+    ts = np.array([0, 100, 150], dtype=np.int64) * 1000
+    series = {"BTC": (ts, np.array([100, 105, 112], dtype=float))}
+    rise, = backtest.run_backtest([
+        models.AlertCreate(symbol="BTC", condition="pct_change", percent=10, window_seconds=60),
+    ], series)
+
+    # À 150s, la fenêtre commence à 90s: le prix en vigueur est celui de 0s
+    # (100 -> 112: +12%), pas la première cotation après 90s (105)
+    assert rise["trigger_count"] == 1
+    assert rise["triggers"][0]["timestamp"] == backtest._iso(150_000)
+
+
+def test_pct_change_needs_history_before_window():
+    series = make_series([100, 70, 80, 50])
+    drop, = backtest.run_backtest([
+        models.AlertCreate(symbol="BTC", condition="pct_change", percent=-25, window_seconds=120),
+    ], series)
+
+    # La baisse à 60s (-30%) précède une fenêtre complète: ignorée;
+    # à 180s la référence est le prix à 60s (70 -> 50)
+    assert trigger_prices(drop) == [50]
+
+
+def test_unknown_symbol_has_no_data_points():
+    result, = backtest.run_backtest(
+        [models.AlertCreate(symbol="ETH", condition="above", target_price=1)], make_series([10])
+    )
+    assert result["data_points"] == 0
+    assert result["first_trigger"] is None
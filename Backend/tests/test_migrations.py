@@ -0,0 +1,50 @@
+# test_migrations.py
+"""Tests de la mise à niveau d'une base existante (migrations.upgrade_schema)"""
+from sqlalchemy import create_engine, inspect
+
+import database_models
+import migrations
+
+# Table price_alerts telle que créée avant les alertes avancées
+LEGACY_PRICE_ALERTS = """
+CREATE TABLE price_alerts (
+    id INTEGER NOT NULL,
+    symbol VARCHAR(10) NOT NULL,
+    target_price FLOAT NOT NULL,
+    condition VARCHAR(10) NOT NULL,
+    status VARCHAR(20),
+    created_at DATETIME,
+    triggered_at DATETIME,
+    PRIMARY KEY (id)
+)
+"""
+
+
+def test_legacy_price_alerts_is_rebuilt_and_keeps_alerts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(LEGACY_PRICE_ALERTS)
+        conn.exec_driver_sql("CREATE INDEX ix_price_alerts_symbol ON price_alerts (symbol)")
+        conn.exec_driver_sql(
+            "INSERT INTO price_alerts (id, symbol, target_price, condition, status) "
+            "VALUES (7, 'BTC', 100, 'above', 'active')"
+        )
+
+    migrations.upgrade_schema(engine)
+    database_models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade_schema(engine)  # Idempotente
+
+    columns = {c["name"]: c for c in inspect(engine).get_columns("price_alerts")}
+    assert {"percent", "window_seconds", "reference_price"} <= set(columns)
+    assert columns["target_price"]["nullable"]
+    indexes = {index["name"] for index in inspect(engine).get_indexes("price_alerts")}
+    assert {"ix_price_alerts_symbol", "ix_price_alerts_status_created_id"} <= indexes
+
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("SELECT id, symbol FROM price_alerts").all() == [(7, "BTC")]
+        conn.exec_driver_sql("DELETE FROM price_alerts")
+        conn.exec_driver_sql(
+            "INSERT INTO price_alerts (symbol, condition, percent) VALUES ('ETH', 'trailing', 5)"
+        )
+        # AUTOINCREMENT: l'id d'une alerte supprimée n'est pas réutilisé
+        assert conn.exec_driver_sql("SELECT id FROM price_alerts").scalar() == 8
@@ -0,0 +1,30 @@
+# test_tick_store.py
+"""Tests du stockage des cotations (tick_store.TickStore)"""
+import os
+
+import tick_store
+
+DAY_MS = 24 * 3600 * 1000
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_read_spans_days_and_bounds_open_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(tick_store, "MAX_CACHED_MAPS", 8)
+    monkeypatch.setattr(tick_store, "MAX_OPEN_HANDLES", 4)
+    store = tick_store.TickStore(str(tmp_path))
+    symbols = [f"S{i}" for i in range(10)]
+
+    baseline = open_fds()
+    for day in range(20):
+        store.append({s: {"price": day + 1.0} for s in symbols}, ts_ms=day * DAY_MS)
+        assert open_fds() - baseline <= 4
+
+    for symbol in symbols:
+        ticks = store.read_concat(symbol, 0, 20 * DAY_MS)
+        assert list(ticks["price"]) == [day + 1.0 for day in range(20)]
+    del ticks
+    assert open_fds() - baseline <= 4 + 8
+    store.close()
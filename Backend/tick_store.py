@@ -0,0 +1,193 @@
+# tick_store.py
+"""
+Stockage local, en ajout seul, de toutes les cotations reçues.
+
+Chaque cotation est un enregistrement binaire de taille fixe (TICK_DTYPE).
+Les enregistrements sont ajoutés dans des segments journaliers, un fichier
+par symbole: <racine>/<AAAA-MM-JJ>/<symbol_id>.ticks. Les lectures passent
+par np.memmap et retournent des vues NumPy sans copie, bornées par
+recherche dichotomique sur l'horodatage (les fichiers sont triés par
+construction).
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Enregistrement de 32 octets, little-endian, sans alignement
+TICK_DTYPE = np.dtype([
+    ("symbol_id", "<u4"),
+    ("ts", "<i8"),            # millisecondes epoch UTC
+    ("price", "<f8"),
+    ("change_24h", "<f4"),    # variation 24h en %
+    ("market_cap", "<f8"),
+])
+
+SEGMENT_SUFFIX = ".ticks"
+REGISTRY_FILE = "symbols.json"
+
+# Bornes des descripteurs de fichiers gardés ouverts (chaque memmap garde le sien)
+MAX_CACHED_MAPS = 64       # Segments passés mappés en cache (LRU)
+MAX_OPEN_HANDLES = 64      # Segments du jour ouverts en écriture (LRU)
+
+
+def _day(ts_ms: int) -> str:
+    return datetime.utcfromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d")
+
+
+class TickStore:
+    """Segments journaliers en ajout seul, lus par memory-mapping"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        # Segments des jours passés: immuables, les plus récemment lus restent mappés.
+        # Un memmap évincé est libéré (avec son descripteur) dès que plus aucune
+        # vue retournée ne le référence: le fermer explicitement invaliderait ces vues.
+        self._maps: "OrderedDict[str, np.memmap]" = OrderedDict()
+        self._handles: "OrderedDict[int, object]" = OrderedDict()
+        self._handles_day: Optional[str] = None
+        os.makedirs(root, exist_ok=True)
+        self._registry_path = os.path.join(root, REGISTRY_FILE)
+        self._symbol_ids: Dict[str, int] = {}
+        if os.path.exists(self._registry_path):
+            with open(self._registry_path) as f:
+                self._symbol_ids = json.load(f)
+
+    # ---------- Identifiants de symboles ----------
+
+    def symbol_id(self, symbol: str, create: bool = False) -> Optional[int]:
+        """Identifiant stable d'un symbole (attribué au premier enregistrement)"""
+        sid = self._symbol_ids.get(symbol)
+        if sid is None and create:
+            sid = len(self._symbol_ids) + 1
+            self._symbol_ids[symbol] = sid
+            tmp_path = self._registry_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._symbol_ids, f)
+            os.replace(tmp_path, self._registry_path)
+        return sid
+
+    def _segment_path(self, day: str, sid: int) -> str:
+        return os.path.join(self.root, day, f"{sid}{SEGMENT_SUFFIX}")
+
+    # ---------- Écriture ----------
+
+    def _handle(self, day: str, sid: int):
+        """Fichier du segment courant ouvert en ajout (fermés au changement de jour)"""
+        if day != self._handles_day:
+            self.close()
+            os.makedirs(os.path.join(self.root, day), exist_ok=True)
+            self._handles_day = day
+        handle = self._handles.get(sid)
+        if handle is None:
+            while len(self._handles) >= MAX_OPEN_HANDLES:
+                _, oldest = self._handles.popitem(last=False)
+                oldest.close()
+            handle = open(self._segment_path(day, sid), "ab")
+            self._handles[sid] = handle
+        else:
+            self._handles.move_to_end(sid)
+        return handle
+
+    def append(self, quotes: Dict[str, dict], ts_ms: Optional[int] = None):
+        """Ajouter une cotation par symbole ({symbole: {price, percent_change_24h, market_cap}})"""
+        if not quotes:
+            return
+
+        def field(quote: dict, key: str) -> float:
+            value = quote.get(key)
+            return np.nan if value is None else value
+
+        with self._lock:
+            ts_ms = ts_ms if ts_ms is not None else int(time.time() * 1000)
+            day = _day(ts_ms)
+
+            records = np.zeros(len(quotes), dtype=TICK_DTYPE)
+            records["symbol_id"] = [self.symbol_id(symbol, create=True) for symbol in quotes]
+            records["ts"] = ts_ms
+            records["price"] = [field(q, "price") for q in quotes.values()]
+            records["change_24h"] = [field(q, "percent_change_24h") for q in quotes.values()]
+            records["market_cap"] = [field(q, "market_cap") for q in quotes.values()]
+
+            for record in records:
+                handle = self._handle(day, int(record["symbol_id"]))
+                handle.write(record.tobytes())
+            # Rendre les enregistrements visibles aux lecteurs memmap
+            for handle in self._handles.values():
+                handle.flush()
+
+    def close(self):
+        """Fermer les fichiers ouverts en écriture"""
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = OrderedDict()
+        self._handles_day = None
+
+    # ---------- Lecture ----------
+
+    def _segment(self, day: str, sid: int, today: str) -> Optional[np.ndarray]:
+        """Vue memmap d'un segment (ignorant un éventuel enregistrement tronqué)"""
+        path = self._segment_path(day, sid)
+        if day != today:
+            with self._lock:
+                cached = self._maps.get(path)
+                if cached is not None:
+                    self._maps.move_to_end(path)
+                    return cached
+        try:
+            count = os.path.getsize(path) // TICK_DTYPE.itemsize
+        except OSError:
+            return None
+        if count == 0:
+            return None
+
+        segment = np.memmap(path, dtype=TICK_DTYPE, mode="r", shape=(count,))
+        if day != today:
+            with self._lock:
+                self._maps[path] = segment
+                while len(self._maps) > MAX_CACHED_MAPS:
+                    self._maps.popitem(last=False)
+        return segment
+
+    def _days(self, first: str, last: str) -> List[str]:
+        """Jours existants dans [first, last] (les noms AAAA-MM-JJ se trient comme des dates)"""
+        return sorted(
+            day for day in os.listdir(self.root)
+            if first <= day <= last and os.path.isdir(os.path.join(self.root, day))
+        )
+
+    def read(self, symbol: str, start_ms: int, end_ms: int) -> List[np.ndarray]:
+        """
+        Cotations d'un symbole dans [start_ms, end_ms], sous forme de vues sans
+        copie (une par segment journalier, dans l'ordre chronologique).
+        """
+        sid = self.symbol_id(symbol)
+        if sid is None or end_ms < start_ms:
+            return []
+
+        today = _day(int(time.time() * 1000))
+        first, last = _day(max(start_ms, 0)), _day(end_ms)
+        views = []
+        for day in self._days(first, last):
+            segment = self._segment(day, sid, today)
+            if segment is None:
+                continue
+            ts = segment["ts"]
+            lo = np.searchsorted(ts, start_ms, side="left")
+            hi = np.searchsorted(ts, end_ms, side="right")
+            if hi > lo:
+                views.append(segment[lo:hi])
+        return views
+
+    def read_concat(self, symbol: str, start_ms: int, end_ms: int) -> np.ndarray:
+        """Comme read(), en un seul tableau (copie seulement si plusieurs segments)"""
+        views = self.read(symbol, start_ms, end_ms)
+        if not views:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return views[0] if len(views) == 1 else np.concatenate(views)
@@ -7,10 +7,16 @@ import type {
   PerformanceHistory,
   CryptoMarketInfo,
   Currency,
+  DashboardData,
+  Page,
 } from "./types";
 
 const API_BASE = "http://localhost:8000";
 
+// Taille des pages des listes (curseur de la page suivante dans X-Next-Cursor)
+const ALERTS_PAGE_SIZE = 50;
+const ASSETS_PAGE_SIZE = 1000;
+
 const DEFAULT_HEADERS = {
   "Content-Type": "application/json",
   Accept: "application/json",
@@ -35,6 +41,27 @@ async function fetchApi<T>(
   return response.json();
 }
 
+async function fetchPage<T>(endpoint: string): Promise<Page<T>> {
+  const response = await fetch(`${API_BASE}${endpoint}`, {
+    headers: DEFAULT_HEADERS,
+  });
+
+  if (!response.ok) {
+    throw new Error(`API Error: ${response.status} ${response.statusText}`);
+  }
+
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
+}
+
+function pageQuery(limit: number, after?: string | null): string {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (after) params.set("after", after);
+  return params.toString();
+}
+
 // Portfolio endpoints
 export const portfolioAPI = {
   getValuation: (currency: Currency = "USD"): Promise<PortfolioValuation> =>
@@ -43,7 +70,19 @@ export const portfolioAPI = {
   getDiversification: (): Promise<DiversificationData[]> =>
     fetchApi("/portfolio/diversification"),
 
-  getAssets: (): Promise<Asset[]> => fetchApi("/portfolio/assets"),
+  // Tous les actifs (pages suivies jusqu'à la dernière)
+  getAssets: async (): Promise<Asset[]> => {
+    const assets: Asset[] = [];
+    let cursor: string | null = null;
+    do {
+      const page: Page<Asset> = await fetchPage(
+        `/portfolio/assets?${pageQuery(ASSETS_PAGE_SIZE, cursor)}`,
+      );
+      assets.push(...page.items);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return assets;
+  },
 
   addAsset: (symbol: string, amount: number): Promise<Asset> =>
     fetchApi("/portfolio/assets", {
@@ -68,11 +107,21 @@ export const portfolioAPI = {
     }),
 };
 
+// Dashboard endpoint (valuation, diversification, alerts, history, market in one call)
+export const dashboardAPI = {
+  get: (currency: Currency = "USD"): Promise<DashboardData> =>
+    fetchApi(`/dashboard?currency=${currency}`),
+};
+
 // Alert endpoints
 export const alertsAPI = {
-  getAlerts: (status?: string): Promise<Alert[]> => {
-    const url = status ? `/alerts?status=${status}` : "/alerts";
-    return fetchApi(url);
+  // Une page d'alertes; after: curseur renvoyé par la page précédente
+  getAlertsPage: (
+    status?: string,
+    after?: string | null,
+  ): Promise<Page<Alert>> => {
+    const query = pageQuery(ALERTS_PAGE_SIZE, after);
+    return fetchPage(`/alerts?${query}${status ? `&status=${status}` : ""}`);
   },
 
   createAlert: (
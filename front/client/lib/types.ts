@@ -27,6 +27,30 @@ export interface DiversificationData {
   percentage: number;
 }
 
+// Aggregated dashboard (GET /dashboard)
+export interface DashboardData {
+  valuation: PortfolioValuation | null;
+  diversification: {
+    total_value_usd: number;
+    diversification: DiversificationData[];
+  } | null;
+  alerts: {
+    active: number;
+    by_symbol: Record<string, number>;
+    closest: Array<{ symbol: string; distance_pct: number }>;
+  };
+  history: PerformanceHistory | null;
+  top_market: Array<{
+    rank: number;
+    symbol: string;
+    name: string;
+    price: number;
+    percent_change_24h: number;
+    market_cap: number;
+  }> | null;
+  errors: Record<string, string>;
+}
+
 // Alert types
 export interface Alert {
   id: string;
@@ -37,6 +61,12 @@ export interface Alert {
   created_date: string;
 }
 
+// Page d'une liste paginée par curseur (en-tête X-Next-Cursor)
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
 export interface AlertCheckResult {
   total_checked: number;
   triggered_count: number;
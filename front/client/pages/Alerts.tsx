@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { Trash2, CheckCircle } from "lucide-react";
 import { alertsAPI } from "@/lib/api";
 import { formatCurrency, formatDate, formatPercentage } from "@/lib/format";
@@ -6,7 +6,7 @@ import { useApi, useMutation } from "@/hooks/useApi";
 import { CardSkeleton, TableSkeleton } from "@/components/ui/skeleton";
 import { ConfirmDialog } from "@/components/ui/confirm-dialog";
 import { toast } from "sonner";
-import type { Alert } from "@/lib/types";
+import type { Alert, Page } from "@/lib/types";
 
 type AlertStatus = "all" | "active" | "triggered";
 
@@ -27,10 +27,27 @@ export function Alerts() {
   const [checkResult, setCheckResult] = useState<CheckResult | null>(null);
   const [formErrors, setFormErrors] = useState<Record<string, string>>({});
 
-  // Fetch alerts
-  const alerts = useApi(
-    () => alertsAPI.getAlerts(status === "all" ? undefined : status),
-    [status],
+  // Fetch alerts (première page, les suivantes à la demande)
+  const statusFilter = status === "all" ? undefined : status;
+  const alerts = useApi(() => alertsAPI.getAlertsPage(statusFilter), [status]);
+  const [morePages, setMorePages] = useState<Page<Alert>[]>([]);
+
+  // Nouvelle première page (filtre, création, suppression): pages suivantes oubliées
+  useEffect(() => setMorePages([]), [alerts.data]);
+
+  const pages = alerts.data ? [alerts.data, ...morePages] : [];
+  const alertItems = pages.flatMap((page) => page.items);
+  const nextCursor = pages.length ? pages[pages.length - 1].nextCursor : null;
+
+  // Load next page
+  const loadMore = useMutation(
+    (cursor: string) => alertsAPI.getAlertsPage(statusFilter, cursor),
+    {
+      onSuccess: (page: Page<Alert>) => setMorePages((prev) => [...prev, page]),
+      onError: (error) => {
+        toast.error(`Erreur: ${error.message}`);
+      },
+    },
   );
 
   // Delete alert mutation
@@ -335,7 +352,7 @@ export function Alerts() {
                 Réessayer
               </button>
             </div>
-          ) : (alerts.data || []).length === 0 ? (
+          ) : alertItems.length === 0 ? (
             <div className="bg-card border border-border rounded-lg p-12 text-center">
               <p className="text-muted-foreground text-lg">Aucune alerte</p>
               <p className="text-sm text-muted-foreground mt-2">
@@ -369,7 +386,7 @@ export function Alerts() {
                     </tr>
                   </thead>
                   <tbody className="divide-y divide-border">
-                    {(alerts.data || []).map((alert) => (
+                    {alertItems.map((alert) => (
                       <tr
                         key={alert.id}
                         className="hover:bg-card/50 transition-colors"
@@ -406,6 +423,17 @@ export function Alerts() {
                   </tbody>
                 </table>
               </div>
+              {nextCursor && (
+                <div className="border-t border-border p-4 text-center">
+                  <button
+                    onClick={() => loadMore.mutate(nextCursor)}
+                    disabled={loadMore.loading}
+                    className="text-primary hover:underline disabled:opacity-50"
+                  >
+                    {loadMore.loading ? "Chargement..." : "Charger plus"}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
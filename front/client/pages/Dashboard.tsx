@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { RefreshCw, TrendingUp, TrendingDown } from "lucide-react";
-import { portfolioAPI } from "@/lib/api";
+import { dashboardAPI } from "@/lib/api";
 import {
   formatCurrency,
   formatCryptoAmount,
@@ -41,14 +41,21 @@ export function Dashboard() {
   const [refreshInterval, setRefreshInterval] = useState<number | null>(30);
   const [nextRefreshIn, setNextRefreshIn] = useState(30);
 
-  // Fetch portfolio valuation
-  const valuation = useApi(
-    () => portfolioAPI.getValuation(currency),
-    [currency],
-  );
+  // Fetch valuation and diversification in a single dashboard call
+  const dashboard = useApi(() => dashboardAPI.get(currency), [currency]);
+  const quotesError = dashboard.data?.errors?.quotes;
+
+  const valuation = {
+    ...dashboard,
+    data: dashboard.data?.valuation ?? null,
+    error: dashboard.error ?? (quotesError ? new Error(quotesError) : null),
+  };
 
-  // Fetch diversification data
-  const diversification = useApi(() => portfolioAPI.getDiversification(), []);
+  const diversification = {
+    ...dashboard,
+    data: dashboard.data?.diversification?.diversification ?? null,
+    error: dashboard.error ?? (quotesError ? new Error(quotesError) : null),
+  };
 
   // Auto-refresh timer
   useEffect(() => {